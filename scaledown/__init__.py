@@ -1,28 +1,35 @@
+import importlib
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 # Configuration
 from scaledown.config import set_api_key, get_api_key
 
-# Core Components
-from scaledown.pipeline import Pipeline, make_pipeline
-# HasteOptimizer is optional, import from scaledown.optimizer if needed
-from scaledown.compressor.scaledown_compressor import ScaleDownCompressor
-
-# Types & Exceptions
-from scaledown.types import (
-    CompressedPrompt,
-    OptimizedContext,
-    PipelineResult,
-    StepMetadata
-)
-
 from scaledown.exceptions import (
     ScaleDownError,
     AuthenticationError,
     APIError
 )
 
+# Everything else is imported on first attribute access (PEP 562), so
+# `import scaledown` does not pay for requests, tiktoken or the compressors
+_LAZY_ATTRIBUTES = {
+    # Core Components
+    "Pipeline": "scaledown.pipeline",
+    "make_pipeline": "scaledown.pipeline",
+    # HasteOptimizer is optional, import from scaledown.optimizer if needed
+    "ScaleDownCompressor": "scaledown.compressor.scaledown_compressor",
+    "AsyncScaleDownCompressor": "scaledown.compressor.async_compressor",
+    "LocalCompressor": "scaledown.compressor.local_compressor",
+    "set_token_counter": "scaledown.types.metrics",
+    # Types
+    "CompressedPrompt": "scaledown.types",
+    "OptimizedContext": "scaledown.types",
+    "PipelineResult": "scaledown.types",
+    "StepMetadata": "scaledown.types",
+}
+_LAZY_SUBMODULES = ("compressor", "optimizer", "pipeline", "types", "testing")
+
 # Initialize global state if env var exists
 _API_KEY: Optional[str] = os.environ.get("SCALEDOWN_API_KEY")
 
@@ -30,8 +37,11 @@ __all__ = [
     "Pipeline",
     "make_pipeline",
     "ScaleDownCompressor",
+    "AsyncScaleDownCompressor",
+    "LocalCompressor",
     "set_api_key",
     "get_api_key",
+    "set_token_counter",
     "PipelineResult",
     "StepMetadata",
     "CompressedPrompt",
@@ -40,3 +50,23 @@ __all__ = [
     "AuthenticationError",
     "APIError"
 ]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_LAZY_SUBMODULES))
+
+if TYPE_CHECKING:
+    from scaledown.pipeline import Pipeline, make_pipeline
+    from scaledown.compressor.scaledown_compressor import ScaleDownCompressor
+    from scaledown.compressor.async_compressor import AsyncScaleDownCompressor
+    from scaledown.compressor.local_compressor import LocalCompressor
+    from scaledown.types.metrics import set_token_counter
+    from scaledown.types import CompressedPrompt, OptimizedContext, PipelineResult, StepMetadata
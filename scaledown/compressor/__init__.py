@@ -1,3 +1,51 @@
-from .scaledown_compressor import ScaleDownCompressor
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ["ScaleDownCompressor"]
+from .base import BaseCompressor
+
+# Compressors are imported on first access so that importing the package
+# (e.g. for BaseCompressor) does not load the HTTP stack
+_LAZY_ATTRIBUTES = {
+    "ScaleDownCompressor": ".scaledown_compressor",
+    "AsyncScaleDownCompressor": ".async_compressor",
+    "LocalCompressor": ".local_compressor",
+    "CoalescingCompressor": ".coalescer",
+    "BaseCache": ".cache",
+    "MemoryCache": ".cache",
+    "SQLiteCache": ".cache",
+    "TieredCache": ".cache",
+    "ConcurrencyLimiter": ".limiter",
+    "AIMDLimiter": ".limiter",
+}
+
+__all__ = [
+    "BaseCompressor",
+    "ScaleDownCompressor",
+    "AsyncScaleDownCompressor",
+    "LocalCompressor",
+    "CoalescingCompressor",
+    "BaseCache",
+    "MemoryCache",
+    "SQLiteCache",
+    "TieredCache",
+    "ConcurrencyLimiter",
+    "AIMDLimiter",
+]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+if TYPE_CHECKING:
+    from .scaledown_compressor import ScaleDownCompressor
+    from .async_compressor import AsyncScaleDownCompressor
+    from .local_compressor import LocalCompressor
+    from .coalescer import CoalescingCompressor
+    from .cache import BaseCache, MemoryCache, SQLiteCache, TieredCache
+    from .limiter import ConcurrencyLimiter, AIMDLimiter
@@ -0,0 +1,148 @@
+import asyncio
+from typing import Union, List, Optional
+
+from .base import BaseCompressor
+from ..exceptions import AuthenticationError, APIError
+from ..types import CompressedPrompt
+from .config import get_api_url
+from .scaledown_compressor import _build_headers, _build_payload, _parse_response
+
+class AsyncScaleDownCompressor(BaseCompressor):
+    """
+    asyncio-native ScaleDown compressor using the hosted model on API.
+
+    All requests share one ``httpx.AsyncClient`` and the number of in-flight
+    requests is capped by a semaphore, so many concurrent compressions can
+    run on a single event loop without a thread per request.
+
+    Parameters
+    ----------
+    max_concurrency : int, default=32
+        Maximum number of requests in flight at once for this instance.
+    timeout : float, optional
+        Per-request timeout in seconds. ``None`` disables the timeout.
+
+    Example
+    -------
+    >>> async with AsyncScaleDownCompressor(api_key="...") as comp:
+    ...     result = await comp.acompress(context=doc, prompt="Summarize")
+    """
+    def __init__(self, target_model='gpt-4o', rate='auto', api_key=None,
+                 temperature=None, preserve_keywords=False, preserve_words=None,
+                 max_concurrency: int = 32, timeout: Optional[float] = None):
+        super().__init__(rate=rate, api_key=api_key)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self.api_url = get_api_url()
+        self.target_model = target_model
+        self.temperature = temperature
+        self.preserve_keywords = preserve_keywords
+        self.preserve_words = preserve_words or []
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client = None
+        self._semaphore = None
+
+    def _get_client(self):
+        """Lazily create the shared HTTP client and concurrency limiter."""
+        if self._client is None:
+            try:
+                import httpx
+            except ImportError as e:
+                raise ImportError(
+                    "AsyncScaleDownCompressor requires 'httpx'. Install with `pip install scaledown[async]`"
+                ) from e
+            limits = httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            )
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def acompress(self, context: Union[str, List[str]], prompt: Union[str, List[str]],
+                        max_tokens: int = None, **kwargs) -> Union[CompressedPrompt, List[CompressedPrompt]]:
+        """
+        Compress context using ScaleDown's hosted API without blocking the event loop.
+
+        Accepts the same input shapes as ``ScaleDownCompressor.compress``.
+        """
+        if isinstance(context, str) and isinstance(prompt, str):
+            return await self._acompress_single(context, prompt, max_tokens=max_tokens, **kwargs)
+
+        elif isinstance(context, list) and isinstance(prompt, list):
+            if len(context) != len(prompt):
+                raise ValueError("Context list and prompt list must have the same length.")
+            return await self._acompress_batch(context, prompt, max_tokens=max_tokens, **kwargs)
+
+        elif isinstance(context, list) and isinstance(prompt, str):
+            # Broadcast prompt to all contexts
+            return await self._acompress_batch(context, [prompt] * len(context), max_tokens=max_tokens, **kwargs)
+
+        else:
+            raise ValueError("Invalid combination of context and prompt types.")
+
+    def compress(self, context: Union[str, List[str]], prompt: Union[str, List[str]],
+                 max_tokens: int = None, **kwargs) -> Union[CompressedPrompt, List[CompressedPrompt]]:
+        """
+        Blocking wrapper around ``acompress`` for use outside an event loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._compress_and_close(context, prompt, max_tokens=max_tokens, **kwargs))
+        raise RuntimeError(
+            "compress() cannot be called from a running event loop. Use `await acompress()` instead."
+        )
+
+    async def _compress_and_close(self, context, prompt, **kwargs):
+        # The client is bound to the loop created by asyncio.run, so it must not outlive it
+        try:
+            return await self.acompress(context, prompt, **kwargs)
+        finally:
+            await self.aclose()
+
+    async def _acompress_batch(self, context_list, prompt_list, **kwargs):
+        return list(await asyncio.gather(*(
+            self._acompress_single(c, p, **kwargs)
+            for c, p in zip(context_list, prompt_list)
+        )))
+
+    async def _acompress_single(self, context, prompt, max_tokens=None, **kwargs) -> CompressedPrompt:
+        if not self.api_key:
+            raise AuthenticationError("API key not found. Use scaledown.set_api_key() or pass api_key to constructor.")
+
+        client = self._get_client()
+        import httpx
+
+        headers = _build_headers(self.api_key)
+        payload = _build_payload(self, context, prompt, max_tokens=max_tokens, **kwargs)
+
+        try:
+            async with self._semaphore:
+                response = await client.post(
+                    f"{self.api_url}/compress/raw",
+                    headers=headers,
+                    json=payload
+                )
+            response.raise_for_status()
+            return _parse_response(response.json())
+
+        except httpx.HTTPError as e:
+            status_code = getattr(getattr(e, "response", None), "status_code", None)
+            raise APIError(f"Connection failed: {str(e)}", status_code=status_code)
+        except ValueError as e:
+            raise APIError(f"Invalid JSON response: {str(e)}")
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+    async def __aenter__(self) -> "AsyncScaleDownCompressor":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
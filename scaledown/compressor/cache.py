@@ -0,0 +1,235 @@
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..types import CompressedPrompt
+
+def make_cache_key(compressor, context: str, prompt: str, max_tokens=None, **kwargs) -> str:
+    """
+    Stable content hash of everything that influences a compression result.
+    """
+    material = {
+        "context": context,
+        "prompt": prompt,
+        "target_model": compressor.target_model,
+        "rate": compressor.rate,
+        "temperature": compressor.temperature,
+        "preserve_keywords": compressor.preserve_keywords,
+        "preserve_words": list(compressor.preserve_words),
+        "max_tokens": max_tokens,
+        "options": kwargs,
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class BaseCache(ABC):
+    """
+    Base class for compression result caches.
+
+    Caches store ``CompressedPrompt`` objects under keys produced by
+    ``make_cache_key`` and keep hit/miss/eviction counters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CompressedPrompt]:
+        """Return the cached result for ``key`` or ``None``."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: CompressedPrompt) -> None:
+        """Store ``value`` under ``key``."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries."""
+        pass
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class MemoryCache(BaseCache):
+    """
+    Bounded in-process LRU cache with optional time-to-live.
+
+    Parameters
+    ----------
+    maxsize : int, default=1024
+        Maximum number of entries kept before the least recently used is evicted.
+    ttl : float, optional
+        Seconds an entry stays valid. ``None`` keeps entries until evicted.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        super().__init__()
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CompressedPrompt]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._data[key]
+                self.evictions += 1
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        self._record(entry is not None)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: CompressedPrompt) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(BaseCache):
+    """
+    On-disk cache shared between worker processes.
+
+    Uses SQLite in WAL mode so that many processes can read concurrently
+    while one writes.
+
+    Parameters
+    ----------
+    path : str
+        Database file. Created if it does not exist.
+    ttl : float, optional
+        Seconds an entry stays valid. ``None`` keeps entries forever.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS compressions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[CompressedPrompt]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM compressions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and time.time() - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM compressions WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                row = None
+        self._record(row is not None)
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        data["tokens"] = tuple(data["tokens"])
+        return CompressedPrompt(**data)
+
+    def set(self, key: str, value: CompressedPrompt) -> None:
+        encoded = json.dumps(dataclasses.asdict(value), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO compressions (key, value, created) VALUES (?, ?, ?)",
+                (key, encoded, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM compressions")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache(BaseCache):
+    """
+    Memory LRU in front of a shared on-disk tier.
+
+    Lookups try memory first; disk hits are promoted into memory. Writes
+    go to both tiers.
+    """
+
+    def __init__(self, memory: Optional[MemoryCache] = None, disk: Optional[BaseCache] = None):
+        super().__init__()
+        self.memory = memory or MemoryCache()
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[CompressedPrompt]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        self._record(value is not None)
+        return value
+
+    def set(self, key: str, value: CompressedPrompt) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["evictions"] = self.memory.evictions + (self.disk.evictions if self.disk else 0)
+        stats["memory"] = self.memory.stats()
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
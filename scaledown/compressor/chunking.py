@@ -0,0 +1,71 @@
+import re
+from typing import List, Optional, Tuple
+
+from ..types.metrics import count_tokens
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+def split_into_chunks(text: str, max_chunk_tokens: int, model: str = "gpt-4o",
+                      counter: Optional[str] = None) -> List[str]:
+    """
+    Split ``text`` into chunks of at most ``max_chunk_tokens`` tokens.
+
+    Splits prefer paragraph boundaries, then sentence boundaries, and only
+    fall back to word boundaries for a single sentence longer than the
+    limit. Adjacent pieces are packed greedily so chunks are as large as
+    the limit allows.
+    """
+    if max_chunk_tokens < 1:
+        raise ValueError("max_chunk_tokens must be at least 1.")
+
+    # (piece, separator that joins it to the previous piece)
+    pieces: List[Tuple[str, str, int]] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        if not paragraph.strip():
+            continue
+        tokens = count_tokens(paragraph, model=model, counter=counter)
+        if tokens <= max_chunk_tokens:
+            pieces.append((paragraph, "\n\n", tokens))
+            continue
+        separator = "\n\n"
+        for sentence in _SENTENCE_BREAK.split(paragraph):
+            if not sentence:
+                continue
+            tokens = count_tokens(sentence, model=model, counter=counter)
+            if tokens <= max_chunk_tokens:
+                pieces.append((sentence, separator, tokens))
+            else:
+                for part in _split_words(sentence, tokens, max_chunk_tokens, model, counter):
+                    pieces.append((part, separator, count_tokens(part, model=model, counter=counter)))
+                    separator = " "
+            separator = " "
+
+    chunks: List[str] = []
+    current = ""
+    current_tokens = 0
+    for piece, separator, tokens in pieces:
+        if current and current_tokens + tokens > max_chunk_tokens:
+            chunks.append(current)
+            current, current_tokens = "", 0
+        current = f"{current}{separator}{piece}" if current else piece
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_words(sentence: str, tokens: int, max_chunk_tokens: int, model: str,
+                 counter: Optional[str] = None) -> List[str]:
+    words = sentence.split()
+    # Size slices from the sentence's average tokens-per-word, then shrink any that overshoot
+    step = max(1, len(words) * max_chunk_tokens // max(tokens, 1))
+    parts = []
+    start = 0
+    while start < len(words):
+        end = min(start + step, len(words))
+        while end - start > 1 and count_tokens(" ".join(words[start:end]), model=model, counter=counter) > max_chunk_tokens:
+            end -= max(1, (end - start) // 10)
+        parts.append(" ".join(words[start:end]))
+        start = end
+    return parts
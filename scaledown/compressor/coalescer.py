@@ -0,0 +1,176 @@
+import inspect
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Union, List, Dict, Any
+
+from .base import BaseCompressor
+from ..types import CompressedPrompt
+
+_STOP = object()
+
+class CoalescingCompressor(BaseCompressor):
+    """
+    Opt-in micro-batching layer in front of a compressor.
+
+    Concurrent single ``compress(context=str, prompt=str)`` calls are
+    collected for up to ``max_wait_ms`` (or until ``max_batch_size`` requests
+    are waiting) and dispatched as one batched call on the wrapped
+    compressor. Each caller blocks on its own future and receives its own
+    ``CompressedPrompt``, or its own item's error. List inputs bypass the
+    queue.
+
+    Compressors whose ``compress`` accepts ``return_exceptions`` (such as
+    ``ScaleDownCompressor``) report failures per item, so one bad request
+    does not affect the rest of its batch. For other compressors a failed
+    batch is retried item by item.
+
+    Parameters
+    ----------
+    compressor : BaseCompressor
+        The compressor that executes batches, usually a ``ScaleDownCompressor``.
+    max_batch_size : int, default=32
+        Dispatch as soon as this many requests are waiting.
+    max_wait_ms : float, default=5.0
+        Longest time the first request in a batch waits for company.
+    max_inflight_batches : int, default=2
+        Number of batches that may be dispatched concurrently.
+
+    Example
+    -------
+    >>> comp = CoalescingCompressor(ScaleDownCompressor(), max_wait_ms=10)
+    >>> comp.compress(context=doc, prompt="Summarize")  # safe to call from many threads
+    """
+
+    def __init__(self, compressor: BaseCompressor, max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, max_inflight_batches: int = 2):
+        super().__init__(rate=compressor.rate, api_key=compressor.api_key)
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms cannot be negative.")
+        self.compressor = compressor
+        self._per_item_errors = "return_exceptions" in inspect.signature(compressor.compress).parameters
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue" = queue.Queue()
+        self._dispatch_pool = ThreadPoolExecutor(max_workers=max_inflight_batches)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._closed = False
+        self._batches = 0
+        self._items = 0
+
+    def compress(self, context: Union[str, List[str]], prompt: Union[str, List[str]],
+                 max_tokens: int = None, **kwargs) -> Union[CompressedPrompt, List[CompressedPrompt]]:
+        """
+        Compress context, coalescing single requests with concurrent callers.
+        """
+        if isinstance(context, str) and isinstance(prompt, str):
+            return self.submit(context, prompt, max_tokens=max_tokens, **kwargs).result()
+        return self.compressor.compress(context, prompt, max_tokens=max_tokens, **kwargs)
+
+    def submit(self, context: str, prompt: str, max_tokens: int = None, **kwargs) -> Future:
+        """Queue a single request and return a future for its ``CompressedPrompt``."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("CoalescingCompressor is closed.")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._collect, name="scaledown-coalescer", daemon=True)
+                self._worker.start()
+            self._queue.put((context, prompt, max_tokens, kwargs, future))
+        return future
+
+    def _collect(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._dispatch_pool.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        # Requests can only share an upstream call if their options match
+        groups: Dict[str, list] = {}
+        for item in batch:
+            key = json.dumps([item[2], item[3]], sort_keys=True, default=str)
+            groups.setdefault(key, []).append(item)
+
+        with self._lock:
+            self._batches += len(groups)
+            self._items += len(batch)
+
+        for items in groups.values():
+            max_tokens, kwargs = items[0][2], items[0][3]
+            if self._per_item_errors:
+                kwargs = {**kwargs, "return_exceptions": True}
+            try:
+                results = self.compressor.compress(
+                    [i[0] for i in items], [i[1] for i in items],
+                    max_tokens=max_tokens, **kwargs
+                )
+            except Exception as e:
+                if self._per_item_errors:
+                    # Failed before any item ran (e.g. invalid options): same error for all
+                    for item in items:
+                        item[4].set_exception(e)
+                    continue
+                # Isolate the failure so each caller sees only its own error
+                for context, prompt, _, _, future in items:
+                    self._resolve_single(future, context, prompt, max_tokens, kwargs)
+                continue
+            for item, result in zip(items, results):
+                if isinstance(result, Exception):
+                    item[4].set_exception(result)
+                else:
+                    item[4].set_result(result)
+
+    def _resolve_single(self, future, context, prompt, max_tokens, kwargs):
+        try:
+            future.set_result(self.compressor.compress(context, prompt, max_tokens=max_tokens, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of dispatched batches, coalesced requests and mean batch size."""
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "requests": self._items,
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            }
+
+    def close(self) -> None:
+        """Flush pending requests and stop the background worker."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+        if worker is not None:
+            self._queue.put(_STOP)
+            worker.join()
+        self._dispatch_pool.shutdown(wait=True)
+
+    def __enter__(self) -> "CoalescingCompressor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
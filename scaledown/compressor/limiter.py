@@ -0,0 +1,153 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class ConcurrencyLimiter:
+    """
+    Fixed cap on the number of requests in flight.
+
+    Callers ``acquire()`` a slot before issuing a request and ``release()``
+    it afterwards, reporting the observed latency and whether the upstream
+    signalled overload (429, 5xx or a connection failure). The fixed limiter
+    ignores these samples; subclasses use them to tune ``limit``.
+
+    Parameters
+    ----------
+    limit : int, default=5
+        Maximum number of concurrent requests.
+    """
+
+    def __init__(self, limit: int = 5):
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        self._limit = float(limit)
+        self.min_limit = limit
+        self.max_limit = limit
+        self._inflight = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return max(int(self._limit), 1)
+
+    def acquire(self) -> None:
+        """Block until a request slot is free."""
+        with self._cond:
+            self._waiting += 1
+            while self._inflight >= self.limit:
+                self._cond.wait()
+            self._waiting -= 1
+            self._inflight += 1
+
+    def release(self, latency_ms: Optional[float] = None, dropped: bool = False) -> None:
+        """
+        Free a slot and feed back the outcome of the request.
+
+        Parameters
+        ----------
+        latency_ms : float, optional
+            Observed round-trip time. ``None`` means no usable sample.
+        dropped : bool, default=False
+            True if the upstream rejected or failed the request due to load.
+        """
+        with self._cond:
+            self._inflight -= 1
+            self._on_sample(latency_ms, dropped)
+            self._cond.notify_all()
+
+    def _on_sample(self, latency_ms: Optional[float], dropped: bool) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, in-flight requests and callers waiting for a slot."""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "inflight": self._inflight,
+                "waiting": self._waiting,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+            }
+
+
+class AIMDLimiter(ConcurrencyLimiter):
+    """
+    Additive-increase / multiplicative-decrease concurrency limiter.
+
+    Every successful request grows the limit by roughly one per round trip
+    (``1 / limit`` per sample). An overload signal shrinks it by ``backoff``,
+    as does a smoothed recent latency above ``latency_tolerance`` times the
+    long-run baseline. Both are exponential moving averages, over roughly 10
+    and 100 samples, so ordinary jitter in individual requests does not read
+    as congestion while a sustained rise does. Decreases are applied at most
+    once per baseline round trip, so a burst of failures from the same
+    window only backs off once.
+
+    Parameters
+    ----------
+    initial_limit : int, default=5
+        Starting concurrency.
+    min_limit : int, default=1
+        Lower bound for the limit.
+    max_limit : int, default=64
+        Upper bound for the limit.
+    backoff : float, default=0.5
+        Multiplier applied on overload.
+    latency_tolerance : float, default=2.0
+        Recent latency above this multiple of the baseline counts as congestion.
+    """
+
+    # Weights of a new sample in the recent and baseline latency averages
+    _RECENT_WEIGHT = 0.1
+    _BASELINE_WEIGHT = 0.01
+
+    def __init__(self, initial_limit: int = 5, min_limit: int = 1, max_limit: int = 64,
+                 backoff: float = 0.5, latency_tolerance: float = 2.0):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit.")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1.")
+        super().__init__(limit=initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self._baseline_ms: Optional[float] = None
+        self._recent_ms: Optional[float] = None
+        self._last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    def _on_sample(self, latency_ms: Optional[float], dropped: bool) -> None:
+        congested = dropped
+        if latency_ms is not None and not dropped:
+            if self._baseline_ms is None:
+                self._baseline_ms = self._recent_ms = latency_ms
+            else:
+                self._recent_ms += self._RECENT_WEIGHT * (latency_ms - self._recent_ms)
+                self._baseline_ms += self._BASELINE_WEIGHT * (latency_ms - self._baseline_ms)
+            congested = self._recent_ms > self.latency_tolerance * self._baseline_ms
+
+        if congested:
+            now = time.monotonic()
+            window = (self._baseline_ms or 0.0) / 1000
+            if now - self._last_decrease >= window:
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+        elif latency_ms is not None:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self.increases += 1
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._cond:
+            stats.update({
+                "baseline_latency_ms": self._baseline_ms,
+                "recent_latency_ms": self._recent_ms,
+                "increases": self.increases,
+                "decreases": self.decreases,
+            })
+        return stats
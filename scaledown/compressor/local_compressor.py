@@ -0,0 +1,231 @@
+import math
+import re
+import time
+from collections import Counter
+from typing import Union, List, Optional, Set
+
+from .base import BaseCompressor
+from ..types import CompressedPrompt
+from ..types.metrics import count_tokens
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his
+i if in into is it its me my of on or our she so such than that the their them then there
+these they this those to too us was we were what when where which while who will with would
+you your very just also about over after before again more most some any each other
+""".split())
+
+
+class LocalCompressor(BaseCompressor):
+    """
+    Extractive, prompt-aware compressor that runs entirely in-process.
+
+    Sentences are scored by lexical overlap with the prompt (weighted by
+    inverse frequency within the context) and by their self-information
+    under a unigram model of the context. The best sentences are kept in
+    their original order, near-duplicates are dropped, and if the result
+    is still over budget words are pruned from the lowest-ranked sentences:
+    stopwords first, then the least informative words. If no sentence fits
+    the budget whole, the best one is kept and pruned down to it.
+
+    No network access or API key is needed, which makes it usable as a
+    low-latency tier or as a fallback for ``ScaleDownCompressor``.
+
+    Parameters
+    ----------
+    target_model : str, default='gpt-4o'
+        Model whose tokenizer is used for token budgets and metrics.
+    rate : float or 'auto', default='auto'
+        Fraction of tokens to keep. ``'auto'`` keeps sentences scoring at or
+        above the mean.
+    preserve_keywords : bool, default=False
+        Never prune numbers, capitalised words or prompt terms at word level.
+    preserve_words : List[str], optional
+        Sentences containing any of these (as whole words) are always kept,
+        and the words themselves are never pruned.
+    redundancy_threshold : float, default=0.8
+        Sentences whose word-set Jaccard similarity with an already kept
+        sentence reaches this value are dropped.
+    token_counter : {'exact', 'approx'}, optional
+        Token counting mode for budgets and metrics. Defaults to the
+        process-wide mode.
+    """
+
+    def __init__(self, target_model: str = 'gpt-4o', rate='auto', preserve_keywords: bool = False,
+                 preserve_words: Optional[List[str]] = None, redundancy_threshold: float = 0.8,
+                 token_counter: Optional[str] = None):
+        super().__init__(rate=rate)
+        if rate != 'auto' and not 0 < float(rate) <= 1:
+            raise ValueError("rate must be 'auto' or a float in (0, 1].")
+        self.target_model = target_model
+        self.preserve_keywords = preserve_keywords
+        self.preserve_words = preserve_words or []
+        self.redundancy_threshold = redundancy_threshold
+        self.token_counter = token_counter
+
+    def compress(self, context: Union[str, List[str]], prompt: Union[str, List[str]],
+                 max_tokens: int = None, **kwargs) -> Union[CompressedPrompt, List[CompressedPrompt]]:
+        """
+        Compress context locally relative to the prompt.
+        """
+        if isinstance(context, str) and isinstance(prompt, str):
+            return self._compress_single(context, prompt, max_tokens=max_tokens)
+
+        elif isinstance(context, list) and isinstance(prompt, list):
+            if len(context) != len(prompt):
+                raise ValueError("Context list and prompt list must have the same length.")
+            return [self._compress_single(c, p, max_tokens=max_tokens) for c, p in zip(context, prompt)]
+
+        elif isinstance(context, list) and isinstance(prompt, str):
+            return [self._compress_single(c, prompt, max_tokens=max_tokens) for c in context]
+
+        else:
+            raise ValueError("Invalid combination of context and prompt types.")
+
+    def _compress_single(self, context: str, prompt: str, max_tokens: Optional[int] = None) -> CompressedPrompt:
+        start_time = time.time()
+        original_tokens = count_tokens(context, model=self.target_model, counter=self.token_counter)
+
+        sentences = [s.strip() for s in _SENTENCE_BREAK.split(context) if s and s.strip()]
+        budget = self._budget(original_tokens, max_tokens)
+        if not sentences or (budget is not None and original_tokens <= budget):
+            return self._result(context, prompt, original_tokens, original_tokens, start_time)
+
+        words = [[w.lower() for w in _WORD.findall(s)] for s in sentences]
+        scores = self._score(words, prompt)
+        forced = [self._is_preserved(s) for s in sentences]
+        lengths = [count_tokens(s, model=self.target_model, counter=self.token_counter) for s in sentences]
+
+        if budget is None:
+            # 'auto': keep everything scoring at least the mean
+            mean = sum(scores) / len(scores)
+            budget = sum(n for n, score, f in zip(lengths, scores, forced) if score >= mean or f)
+
+        kept = self._select(words, scores, forced, lengths, budget)
+        if not kept:
+            # Nothing fits whole: keep the best sentence and prune it to the budget
+            kept = [max(range(len(scores)), key=scores.__getitem__)]
+        pieces = {i: sentences[i] for i in kept}
+        if sum(lengths[i] for i in kept) > budget:
+            freq = Counter(w for sentence in words for w in sentence)
+            self._prune_words(pieces, kept, scores, lengths, prompt, budget, freq)
+
+        content = " ".join(pieces[i] for i in sorted(kept))
+        compressed_tokens = count_tokens(content, model=self.target_model, counter=self.token_counter)
+        return self._result(content, prompt, original_tokens, compressed_tokens, start_time)
+
+    def _budget(self, original_tokens: int, max_tokens: Optional[int]) -> Optional[int]:
+        budget = None
+        if self.rate != 'auto':
+            budget = max(1, int(original_tokens * float(self.rate)))
+        if max_tokens:
+            budget = min(budget, max_tokens) if budget is not None else max_tokens
+        return budget
+
+    def _score(self, words: List[List[str]], prompt: str) -> List[float]:
+        """Relevance to the prompt plus mean self-information, each scaled to [0, 1]."""
+        freq = Counter(w for sentence in words for w in sentence)
+        total = sum(freq.values()) or 1
+        query = {w.lower() for w in _WORD.findall(prompt)} - _STOPWORDS
+
+        relevance, information = [], []
+        for sentence in words:
+            content_words = [w for w in sentence if w not in _STOPWORDS] or sentence
+            overlap = {w for w in content_words if w in query}
+            relevance.append(sum(math.log(total / freq[w]) + 1 for w in overlap))
+            information.append(
+                sum(-math.log(freq[w] / total) for w in content_words) / len(content_words)
+                if content_words else 0.0
+            )
+
+        max_rel = max(relevance) or 1.0
+        max_info = max(information) or 1.0
+        return [2 * r / max_rel + i / max_info for r, i in zip(relevance, information)]
+
+    def _is_preserved(self, sentence: str) -> bool:
+        return any(
+            re.search(rf"(?<!\w){re.escape(word)}(?!\w)", sentence, re.IGNORECASE)
+            for word in self.preserve_words
+        )
+
+    def _select(self, words, scores, forced, lengths, budget) -> List[int]:
+        order = sorted(range(len(scores)), key=lambda i: (not forced[i], -scores[i]))
+        kept: List[int] = []
+        kept_sets: List[Set[str]] = []
+        used = 0
+        for i in order:
+            word_set = set(words[i])
+            if any(_jaccard(word_set, other) >= self.redundancy_threshold for other in kept_sets):
+                continue
+            if not forced[i] and used + lengths[i] > budget:
+                continue
+            kept.append(i)
+            kept_sets.append(word_set)
+            used += lengths[i]
+        return kept
+
+    def _prune_words(self, pieces, kept, scores, lengths, prompt, budget, freq) -> int:
+        """
+        Prune words, weakest sentences first, until the budget is met: first
+        every stopword, then the words with the least self-information under
+        the context's unigram model, prompt terms last. Each sentence keeps
+        at least one word.
+        """
+        query = {w.lower() for w in _WORD.findall(prompt)}
+        protected = {w.lower() for w in self.preserve_words}
+        if self.preserve_keywords:
+            protected |= query
+        total = sum(freq.values()) or 1
+
+        def information(token: str):
+            parts = _WORD.findall(token.lower())
+            return (any(w in query for w in parts), sum(-math.log(freq.get(w, 1) / total) for w in parts))
+
+        used = sum(lengths[i] for i in kept)
+        for stopwords_only in (True, False):
+            for i in sorted(kept, key=lambda i: scores[i]):
+                if used <= budget:
+                    return used
+                tokens = pieces[i].split()
+                candidates = [j for j, t in enumerate(tokens) if self._droppable(t, j, protected, stopwords_only)]
+                candidates.sort(key=lambda j: information(tokens[j]))
+                candidates = candidates[:len(tokens) - 1]
+                dropped: Set[int] = set()
+                while candidates and used > budget:
+                    # Drop about as many words as the overshoot needs, then re-count
+                    per_word = lengths[i] / max(len(tokens) - len(dropped), 1)
+                    n = len(candidates) if stopwords_only else max(1, math.ceil((used - budget) / max(per_word, 1e-9)))
+                    dropped.update(candidates[:n])
+                    candidates = candidates[n:]
+                    pieces[i] = " ".join(t for j, t in enumerate(tokens) if j not in dropped)
+                    new_length = count_tokens(pieces[i], model=self.target_model, counter=self.token_counter)
+                    used -= lengths[i] - new_length
+                    lengths[i] = new_length
+        return used
+
+    def _droppable(self, token: str, position: int, protected: Set[str], stopwords_only: bool = True) -> bool:
+        core = "".join(_WORD.findall(token)).lower()
+        if not core or core in protected:
+            return False
+        if stopwords_only and core not in _STOPWORDS:
+            return False
+        if self.preserve_keywords and (any(c.isdigit() for c in token) or (position > 0 and token[:1].isupper())):
+            return False
+        return True
+
+    def _result(self, content, prompt, original_tokens, compressed_tokens, start_time) -> CompressedPrompt:
+        return CompressedPrompt(
+            content=content,
+            original_prompt=prompt,
+            tokens=(original_tokens, compressed_tokens),
+            latency=(time.time() - start_time) * 1000,
+            model="local"
+        )
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
@@ -1,106 +1,548 @@
-import requests
-from typing import Union, List, Optional
-from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+import threading
+import time
+from typing import Union, List, Optional, Dict, Any, Iterable, Iterator, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 from .base import BaseCompressor
 from ..exceptions import AuthenticationError, APIError
 from ..types import CompressedPrompt
 from .config import get_api_url
+from .session import PooledSession
+from .cache import BaseCache, make_cache_key
+from .limiter import ConcurrencyLimiter
+from .chunking import split_into_chunks
+from ..types.metrics import count_tokens
 
 class ScaleDownCompressor(BaseCompressor):
     """
     Standard ScaleDown compressor using the hosted model on API.
+
+    Each instance owns a keep-alive connection pool sized to ``max_workers``,
+    so repeated calls reuse connections instead of paying a new TCP+TLS
+    handshake. Call ``close()`` or use the compressor as a context manager
+    to release the pool.
+
+    Parameters
+    ----------
+    max_workers : int, default=5
+        Number of concurrent requests used for batch compression when no
+        ``limiter`` is given.
+    http2 : bool, default=False
+        Multiplex requests over HTTP/2 (requires ``pip install scaledown[http2]``).
+    preconnect : bool, default=False
+        Open a connection to the API on construction so the first call
+        does not pay the handshake.
+    timeout : float, optional
+        Per-request timeout in seconds.
+    cache : BaseCache, optional
+        Compression cache (e.g. ``MemoryCache`` or ``TieredCache``). Identical
+        requests are served from the cache with ``CompressedPrompt.cached`` set.
+    limiter : ConcurrencyLimiter, optional
+        Controls how many requests are in flight. Pass an ``AIMDLimiter`` to
+        adapt concurrency to upstream latency and 429s. Defaults to a fixed
+        limit of ``max_workers``.
+    chunk_threshold : int, optional
+        Contexts longer than this many tokens are split on paragraph and
+        sentence boundaries, compressed in parallel and reassembled.
+        ``None`` disables chunking.
+    chunk_size : int, optional
+        Token limit per chunk. Defaults to ``chunk_threshold``.
+    reduce : bool, default=True
+        When chunking, run a second pass over the reassembled text if it
+        still exceeds ``max_tokens``.
+    request_compression : str, optional, default='auto'
+        gzip/deflate request bodies: ``'auto'`` (once the server advertises
+        support), ``'gzip'``, ``'deflate'`` or ``None``.
+    fast_json : bool, default=True
+        Use ``orjson`` for request/response JSON when installed.
+    min_tokens : int, optional
+        Contexts with fewer tokens are returned unchanged without calling the API.
+    min_savings : int, optional
+        Skip the API call when the expected saving is below this many tokens.
+        The expected size is ``max_tokens`` if given, otherwise the numeric
+        ``rate`` times the context size, otherwise half of it for ``'auto'``.
+    skip_under_budget : bool, default=False
+        Return the context unchanged when it already fits in ``max_tokens``.
+    token_counter : {'exact', 'approx'}, optional
+        Token counting mode for chunking and skip decisions. Defaults to the
+        process-wide mode (see ``scaledown.types.metrics.set_token_counter``).
     """
     def __init__(self, target_model='gpt-4o', rate='auto', api_key=None, 
-                 temperature=None, preserve_keywords=False, preserve_words=None):
+                 temperature=None, preserve_keywords=False, preserve_words=None,
+                 max_workers: int = 5, http2: bool = False, preconnect: bool = False,
+                 timeout: Optional[float] = None, cache: Optional[BaseCache] = None,
+                 limiter: Optional[ConcurrencyLimiter] = None,
+                 chunk_threshold: Optional[int] = None, chunk_size: Optional[int] = None,
+                 reduce: bool = True, request_compression: Optional[str] = "auto",
+                 fast_json: bool = True, min_tokens: Optional[int] = None,
+                 min_savings: Optional[int] = None, skip_under_budget: bool = False,
+                 token_counter: Optional[str] = None):
         super().__init__(rate=rate, api_key=api_key)
         self.api_url = get_api_url()
         self.target_model = target_model
         self.temperature = temperature
         self.preserve_keywords = preserve_keywords
         self.preserve_words = preserve_words or []
+        self.limiter = limiter or ConcurrencyLimiter(max_workers)
+        self.max_workers = self.limiter.max_limit
+        self.cache = cache
+        if chunk_threshold and chunk_size and chunk_size > chunk_threshold:
+            raise ValueError("chunk_size cannot exceed chunk_threshold.")
+        self.chunk_threshold = chunk_threshold
+        self.chunk_size = chunk_size or chunk_threshold
+        self.reduce = reduce
+        self.min_tokens = min_tokens
+        self.min_savings = min_savings
+        self.skip_under_budget = skip_under_budget
+        self.token_counter = token_counter
+        self._session = PooledSession(
+            pool_size=self.max_workers, http2=http2, timeout=timeout,
+            request_compression=request_compression, fast_json=fast_json
+        )
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._backlog = 0
+        self._deduplicated = 0
+        self._skipped = 0
+        if preconnect:
+            self._session.preconnect(self.api_url)
 
     def compress(self, context: Union[str, List[str]], prompt: Union[str, List[str]], 
-                 max_tokens: int = None, **kwargs) -> Union[CompressedPrompt, List[CompressedPrompt]]:
+                 max_tokens: int = None, return_exceptions: bool = False,
+                 **kwargs) -> Union[CompressedPrompt, List[CompressedPrompt]]:
         """
         Compress context using ScaleDown's hosted API.
+
+        With list inputs and ``return_exceptions=True``, an item that fails
+        is returned as its exception in place of a result instead of the
+        whole batch raising.
         """
         if isinstance(context, str) and isinstance(prompt, str):
+            chunks = self._split_oversized(context)
+            if chunks is not None:
+                return self._compress_chunked(chunks, prompt, max_tokens=max_tokens, **kwargs)
             return self._compress_single(context, prompt, max_tokens=max_tokens, **kwargs)
         
         elif isinstance(context, list) and isinstance(prompt, list):
             if len(context) != len(prompt):
                 raise ValueError("Context list and prompt list must have the same length.")
-            return self._compress_batch(context, prompt, max_tokens=max_tokens, **kwargs)
+            return self._compress_batch(context, prompt, max_tokens=max_tokens,
+                                        return_exceptions=return_exceptions, **kwargs)
             
         elif isinstance(context, list) and isinstance(prompt, str):
             # Broadcast prompt to all contexts
-            return self._compress_batch(context, [prompt] * len(context), max_tokens=max_tokens, **kwargs)
+            return self._compress_batch(context, [prompt] * len(context), max_tokens=max_tokens,
+                                        return_exceptions=return_exceptions, **kwargs)
         
         else:
             raise ValueError("Invalid combination of context and prompt types.")
 
-    def _compress_batch(self, context_list, prompt_list, **kwargs):
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            results = list(executor.map(
-                lambda p: self._compress_single(p[0], p[1], **kwargs), 
-                zip(context_list, prompt_list)
-            ))
-        return results
+    def compress_multi(self, context: str, prompts: List[str], max_tokens: int = None,
+                       **kwargs) -> List[CompressedPrompt]:
+        """
+        Compress one context against several prompts.
+
+        The context is tokenised and, if needed, chunked once. Requests for
+        all prompts are then issued together over the pooled connections,
+        so end-to-end latency is close to that of the slowest prompt rather
+        than the sum. The hosted endpoint takes one prompt per request,
+        which means the context is still sent with each prompt. Request-body
+        compression keeps those repeated uploads small.
+
+        Returns
+        -------
+        List[CompressedPrompt]
+            One result per prompt, in the order of ``prompts``.
+        """
+        if not isinstance(context, str) or isinstance(prompts, str):
+            raise ValueError("compress_multi expects a single context string and a list of prompts.")
+
+        chunks = self._split_oversized(context)
+        executor = self._get_executor()
+        if chunks is None:
+            futures = [self._submit(executor, context, p, max_tokens=max_tokens, **kwargs) for p in prompts]
+            return [f.result() for f in futures]
+
+        # Submit every (chunk, prompt) pair before reducing any prompt
+        submitted = [[self._submit(executor, chunk, p, **kwargs) for chunk in chunks] for p in prompts]
+        return [
+            self._reduce_chunks(futures, p, max_tokens=max_tokens, **kwargs)
+            for futures, p in zip(submitted, prompts)
+        ]
+
+    def compress_iter(self, context: Iterable[str], prompt: Union[str, Iterable[str]],
+                      max_tokens: int = None, ordered: bool = False,
+                      read_ahead: Optional[int] = None, **kwargs) -> Iterator[Tuple[int, CompressedPrompt]]:
+        """
+        Compress a stream of contexts, yielding results as they complete.
+
+        Contexts over ``chunk_threshold`` are chunked and reduced as in
+        ``compress``; their chunks count as one item against ``read_ahead``.
+
+        Parameters
+        ----------
+        context : Iterable[str]
+            Any iterable of contexts, including generators. It is consumed lazily.
+        prompt : str or Iterable[str]
+            One prompt for every context, or an iterable paired with ``context``.
+        ordered : bool, default=False
+            Yield in input order. Completed results are buffered only until
+            the results before them are ready.
+        read_ahead : int, optional
+            Maximum number of items submitted or buffered but not yet yielded.
+            Defaults to twice the concurrency limit, which keeps memory flat
+            regardless of input size.
+
+        Yields
+        ------
+        (int, CompressedPrompt)
+            Index of the item in the input and its compressed result.
+
+        Raises
+        ------
+        ValueError
+            Immediately, for a single string ``context`` or a ``read_ahead``
+            below 1; while iterating, if ``prompt`` is an iterable of a
+            different length than ``context``.
+        """
+        # Arguments are checked here, not when the first result is requested
+        if isinstance(context, str):
+            raise ValueError("compress_iter expects an iterable of contexts; use compress() for a single string.")
+        if read_ahead is None:
+            read_ahead = 2 * self.max_workers
+        if read_ahead < 1:
+            raise ValueError("read_ahead must be at least 1.")
+        if isinstance(prompt, str):
+            pairs = ((c, prompt) for c in context)
+        else:
+            pairs = zip(context, prompt, strict=True)
+        return self._iter_results(pairs, max_tokens, ordered, read_ahead, **kwargs)
+
+    def _iter_results(self, pairs: Iterator[Tuple[str, str]], max_tokens: Optional[int], ordered: bool,
+                      read_ahead: int, **kwargs) -> Iterator[Tuple[int, CompressedPrompt]]:
+        executor = self._get_executor()
+        source = enumerate(pairs)
+        pending: Dict[Any, int] = {}
+        queued: Dict[Any, List[Any]] = {}
+        buffered: Dict[int, Any] = {}
+        next_index = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) + len(buffered) < read_ahead:
+                    try:
+                        index, (ctx, prm) = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future, queued[future] = self._submit_item(executor, ctx, prm, max_tokens=max_tokens, **kwargs)
+                    pending[future] = index
+
+                if not pending:
+                    return
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    queued.pop(future)
+                    if ordered:
+                        buffered[index] = future
+                    else:
+                        yield index, future.result()
+
+                while next_index in buffered:
+                    yield next_index, buffered.pop(next_index).result()
+                    next_index += 1
+        finally:
+            # Consumer stopped early or a result raised: drop work that has not started
+            for future in pending:
+                future.cancel()
+                for part in queued[future]:
+                    if part.cancelled() or part.cancel():
+                        with self._executor_lock:
+                            self._backlog -= 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Long-lived worker pool shared by all batch calls on this instance."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="scaledown"
+                )
+            return self._executor
+
+    def _compress_batch(self, context_list, prompt_list, return_exceptions=False, **kwargs):
+        # Identical (context, prompt) pairs share one upstream request
+        unique: Dict[Tuple[str, str], int] = {}
+        positions = [unique.setdefault(pair, len(unique)) for pair in zip(context_list, prompt_list)]
+        deduplicated = len(positions) - len(unique)
+        if deduplicated:
+            with self._executor_lock:
+                self._deduplicated += deduplicated
+
+        executor = self._get_executor()
+        # Every item, and every chunk of oversized items, is submitted before any is awaited
+        futures = [self._submit_item(executor, context, prompt, **kwargs)[0] for context, prompt in unique]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+
+        fanned_out = []
+        seen = set()
+        for position in positions:
+            result = results[position]
+            if position in seen and not isinstance(result, Exception):
+                result = dataclasses.replace(result, details={**result.details, "deduplicated": True})
+            seen.add(position)
+            fanned_out.append(result)
+        return fanned_out
+
+    def _split_oversized(self, context: str) -> Optional[List[str]]:
+        """Return the chunks of ``context`` if it is over ``chunk_threshold``, else None."""
+        if not self.chunk_threshold or count_tokens(context, model=self.target_model, counter=self.token_counter) <= self.chunk_threshold:
+            return None
+        chunks = split_into_chunks(context, self.chunk_size, model=self.target_model, counter=self.token_counter)
+        return chunks if len(chunks) > 1 else None
+
+    def _submit_item(self, executor, context, prompt, max_tokens=None, **kwargs) -> Tuple[Future, List[Future]]:
+        """
+        Submit one context, chunking it if oversized, without blocking.
+
+        Returns the future of its ``CompressedPrompt`` and the queued
+        futures behind it. For an oversized context every chunk is queued
+        now and the reduce runs on a worker once the last chunk finishes.
+        """
+        chunks = self._split_oversized(context)
+        if chunks is None:
+            future = self._submit(executor, context, prompt, max_tokens=max_tokens, **kwargs)
+            return future, [future]
+
+        result: Future = Future()
+        parts = [self._submit(executor, chunk, prompt, **kwargs) for chunk in chunks]
+        remaining = [len(parts)]
+        lock = threading.Lock()
+
+        def on_part_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            if not result.set_running_or_notify_cancel():
+                return
+            try:
+                result.set_result(self._reduce_chunks(parts, prompt, max_tokens=max_tokens, **kwargs))
+            except BaseException as e:
+                result.set_exception(e)
+
+        for part in parts:
+            part.add_done_callback(on_part_done)
+        return result, parts
+
+    def _compress_chunked(self, chunks, prompt, max_tokens=None, **kwargs) -> CompressedPrompt:
+        """Map: compress chunks in parallel. Reduce: reassemble and optionally recompress to max_tokens."""
+        executor = self._get_executor()
+        futures = [self._submit(executor, chunk, prompt, **kwargs) for chunk in chunks]
+        return self._reduce_chunks(futures, prompt, max_tokens=max_tokens, **kwargs)
+
+    def _reduce_chunks(self, futures, prompt, max_tokens=None, **kwargs) -> CompressedPrompt:
+        parts = [f.result() for f in futures]
+        content = "\n\n".join(p.content for p in parts)
+        original_tokens = sum(p.tokens[0] for p in parts)
+        compressed_tokens = sum(p.tokens[1] for p in parts)
+        # Chunks run in parallel, so the slowest one is the map-phase latency
+        latency = max(p.latency for p in parts)
+
+        reduced = False
+        if self.reduce and max_tokens and count_tokens(content, model=self.target_model, counter=self.token_counter) > max_tokens:
+            final = self._compress_single(content, prompt, max_tokens=max_tokens, **kwargs)
+            content = final.content
+            compressed_tokens = final.tokens[1]
+            latency += final.latency
+            reduced = True
+
+        return CompressedPrompt(
+            content=content,
+            original_prompt=prompt,
+            tokens=(original_tokens, compressed_tokens),
+            latency=latency,
+            model=parts[0].model,
+            cached=all(p.cached for p in parts) and not reduced,
+            details={
+                "chunks": len(parts),
+                "chunk_tokens": [p.tokens for p in parts],
+                "reduce_pass": reduced,
+            }
+        )
+
+    def _submit(self, executor, context, prompt, **kwargs):
+        with self._executor_lock:
+            self._backlog += 1
+        return executor.submit(self._run_queued, context, prompt, **kwargs)
+
+    def _run_queued(self, context, prompt, **kwargs):
+        with self._executor_lock:
+            self._backlog -= 1
+        return self._compress_single(context, prompt, **kwargs)
+
+    def _post(self, url, headers, payload):
+        """Send one request under the concurrency limiter, feeding back latency and overload."""
+        self.limiter.acquire()
+        start = time.monotonic()
+        latency_ms, dropped = None, False
+        try:
+            response = self._session.post(url, headers=headers, payload=payload)
+            latency_ms = (time.monotonic() - start) * 1000
+            return response
+        except APIError as e:
+            dropped = e.status_code is None or e.status_code == 429 or e.status_code >= 500
+            raise
+        finally:
+            self.limiter.release(latency_ms=latency_ms, dropped=dropped)
+
+    def _skip_reason(self, tokens: int, max_tokens: Optional[int]) -> Optional[str]:
+        """Why compressing a context of ``tokens`` tokens cannot pay off, or None."""
+        if self.min_tokens is not None and tokens < self.min_tokens:
+            return "below_min_tokens"
+        if self.skip_under_budget and max_tokens is not None and tokens <= max_tokens:
+            return "under_budget"
+        if self.min_savings is not None:
+            if max_tokens is not None:
+                expected = min(max_tokens, tokens)
+            elif self.rate != 'auto':
+                expected = tokens * float(self.rate)
+            else:
+                expected = tokens / 2
+            if tokens - expected < self.min_savings:
+                return "insufficient_savings"
+        return None
 
     def _compress_single(self, context, prompt, max_tokens=None, **kwargs) -> CompressedPrompt:
+        if self.min_tokens is not None or self.min_savings is not None or self.skip_under_budget:
+            tokens = count_tokens(context, model=self.target_model, counter=self.token_counter)
+            reason = self._skip_reason(tokens, max_tokens)
+            if reason is not None:
+                with self._executor_lock:
+                    self._skipped += 1
+                return CompressedPrompt(
+                    content=context,
+                    original_prompt=prompt,
+                    tokens=(tokens, tokens),
+                    latency=0.0,
+                    model=self.target_model,
+                    skipped=True,
+                    details={"skip_reason": reason}
+                )
+
         if not self.api_key:
             raise AuthenticationError("API key not found. Use scaledown.set_api_key() or pass api_key to constructor.")
 
-        headers = {
-            'x-api-key': self.api_key,
-            'Content-Type': 'application/json'
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self, context, prompt, max_tokens=max_tokens, **kwargs)
+            hit = self.cache.get(cache_key)
+            if hit is not None:
+                return dataclasses.replace(hit, cached=True, details=dict(hit.details))
+
+        headers = _build_headers(self.api_key)
+        payload = _build_payload(self, context, prompt, max_tokens=max_tokens, **kwargs)
+
+        full_url=f"{self.api_url}/compress/raw"
+        data, wire = self._post(full_url, headers=headers, payload=payload)
+        result = _parse_response(data)
+        if cache_key is not None:
+            self.cache.set(cache_key, dataclasses.replace(result, details=dict(result.details)))
+        result.details.update(wire)
+        return result
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool and wire counters (new vs reused connections, bytes sent/received)."""
+        return self._session.stats()
+
+    def concurrency_stats(self) -> Dict[str, Any]:
+        """Limiter state plus the number of batch items queued for a worker."""
+        stats = self.limiter.stats()
+        with self._executor_lock:
+            stats["queue_depth"] = self._backlog + stats["waiting"]
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        """All client-side counters for this compressor."""
+        with self._executor_lock:
+            batch = {"deduplicated_requests": self._deduplicated}
+            short_circuit = {"skipped_requests": self._skipped}
+        stats = {
+            "pool": self.pool_stats(),
+            "concurrency": self.concurrency_stats(),
+            "batch": batch,
+            "short_circuit": short_circuit,
         }
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
 
-        #Payload structure that matches documentation (nested 'scaledown' object)
-        payload = {
-            "context": context,
-            "prompt": prompt,
-            "model": self.target_model,
-            "scaledown": {
-                "rate": self.rate,
-                "temperature": self.temperature,
-                "preserve_keywords": self.preserve_keywords,
-                "preserve_words": self.preserve_words,
-                "max_tokens": max_tokens,
-                **kwargs
-            }
+    def close(self) -> None:
+        """Release pooled connections and the batch worker pool."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self._session.close()
+
+    def __enter__(self) -> "ScaleDownCompressor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _build_headers(api_key):
+    return {
+        'x-api-key': api_key,
+        'Content-Type': 'application/json'
+    }
+
+
+def _build_payload(compressor, context, prompt, max_tokens=None, **kwargs):
+    #Payload structure that matches documentation (nested 'scaledown' object)
+    return {
+        "context": context,
+        "prompt": prompt,
+        "model": compressor.target_model,
+        "scaledown": {
+            "rate": compressor.rate,
+            "temperature": compressor.temperature,
+            "preserve_keywords": compressor.preserve_keywords,
+            "preserve_words": compressor.preserve_words,
+            "max_tokens": max_tokens,
+            **kwargs
         }
+    }
 
-        try:
-            full_url=f"{self.api_url}/compress/raw"
-            response = requests.post(
-                 full_url,
-                 headers=headers,
-                 json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract nested data 
-            results = data.get("results", {})
-            
-            # 1. Get content from 'results'
-            content = results.get("compressed_prompt", "")
-            
-            # 2. Map API keys to our internal Metrics names
-            prepared_metrics = {
-                "original_prompt_tokens": data.get("total_original_tokens", results.get("original_prompt_tokens", 0)),
-                "compressed_prompt_tokens": data.get("total_compressed_tokens", results.get("compressed_prompt_tokens", 0)),
-                "latency_ms": data.get("latency_ms", 0),
-                "model_used": data.get("model_used"),
-                "timestamp": data.get("request_metadata", {}).get("timestamp")
-            }
-            
-            return CompressedPrompt.from_api_response(
-                content=content, 
-                raw_response=prepared_metrics 
-            )
 
-        except requests.exceptions.RequestException as e:
-            raise APIError(f"Connection failed: {str(e)}")
+def _parse_response(data) -> CompressedPrompt:
+    # Extract nested data 
+    results = data.get("results", {})
+    
+    # 1. Get content from 'results'
+    content = results.get("compressed_prompt", "")
+    
+    # 2. Map API keys to our internal Metrics names
+    prepared_metrics = {
+        "original_prompt_tokens": data.get("total_original_tokens", results.get("original_prompt_tokens", 0)),
+        "compressed_prompt_tokens": data.get("total_compressed_tokens", results.get("compressed_prompt_tokens", 0)),
+        "latency_ms": data.get("latency_ms", 0),
+        "model_used": data.get("model_used"),
+        "timestamp": data.get("request_metadata", {}).get("timestamp")
+    }
+    
+    return CompressedPrompt.from_api_response(
+        content=content, 
+        raw_response=prepared_metrics 
+    )
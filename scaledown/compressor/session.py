@@ -0,0 +1,227 @@
+import gzip
+import json
+import logging
+import threading
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from ..exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+_CODINGS = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=6),
+    "deflate": lambda body: zlib.compress(body, 6),
+}
+
+def _json_codec(fast: bool):
+    """Return (dumps, loads) working on bytes, preferring orjson when available."""
+    if fast:
+        try:
+            import orjson
+            return orjson.dumps, orjson.loads
+        except ImportError:
+            pass
+    return (
+        lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        json.loads
+    )
+
+def _advertised_coding(accept_encoding: str) -> Optional[str]:
+    offered = [c.split(";")[0].strip().lower() for c in accept_encoding.split(",")]
+    for coding in ("gzip", "deflate"):
+        if coding in offered:
+            return coding
+    return None
+
+class PooledSession:
+    """
+    Thread-safe, keep-alive HTTP connection pool owned by a single compressor.
+
+    By default this wraps a ``requests.Session`` whose adapter keeps up to
+    ``pool_size`` connections open per host. With ``http2=True`` an
+    ``httpx.Client`` is used instead so that concurrent requests are
+    multiplexed over a single connection.
+
+    Parameters
+    ----------
+    pool_size : int, default=5
+        Maximum number of pooled connections. Should match the number of
+        concurrent requests the owner issues.
+    http2 : bool, default=False
+        Use HTTP/2 multiplexing (requires ``pip install scaledown[http2]``).
+    timeout : float, optional
+        Per-request timeout in seconds. ``None`` disables the timeout.
+    request_compression : str, optional, default='auto'
+        Content coding for request bodies: ``'gzip'``, ``'deflate'``,
+        ``'auto'`` or ``None``. ``'auto'`` starts uncompressed and switches
+        to gzip or deflate once the server advertises support through an
+        ``Accept-Encoding`` response header (RFC 7694).
+    compression_min_bytes : int, default=1024
+        Bodies smaller than this are always sent uncompressed.
+    fast_json : bool, default=True
+        Encode and decode JSON with ``orjson`` when it is installed.
+    """
+
+    def __init__(self, pool_size: int = 5, http2: bool = False, timeout: Optional[float] = None,
+                 request_compression: Optional[str] = "auto", compression_min_bytes: int = 1024,
+                 fast_json: bool = True):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._new_connections = 0
+        self._bytes_sent = 0
+        self._bytes_uncompressed = 0
+        self._bytes_received = 0
+        self._closed = False
+
+        if request_compression not in _CODINGS and request_compression not in ("auto", None):
+            raise ValueError("request_compression must be 'gzip', 'deflate', 'auto' or None.")
+        self.request_compression = request_compression
+        self.compression_min_bytes = compression_min_bytes
+        # Coding the server accepts for request bodies; only known up front when forced
+        self._coding = request_compression if request_compression in _CODINGS else None
+        self._dumps, self._loads = _json_codec(fast_json)
+
+        if http2:
+            try:
+                import httpx
+                import h2  # noqa: F401
+            except ImportError as e:
+                raise ImportError(
+                    "HTTP/2 support requires 'httpx[http2]'. Install with `pip install scaledown[http2]`"
+                ) from e
+            self._client = httpx.Client(
+                http2=True,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+            self._errors = (httpx.HTTPError,)
+        else:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+            self._adapter = adapter
+            self._errors = (requests.exceptions.RequestException,)
+
+    def post(self, url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        POST ``payload`` as JSON.
+
+        Returns
+        -------
+        (dict, dict)
+            The decoded JSON response and the request's wire accounting
+            (``bytes_sent``, ``bytes_uncompressed``, ``bytes_received``).
+        """
+        if self._closed:
+            raise APIError("Session is closed.")
+        body = self._dumps(payload)
+        coding = self._coding if len(body) >= self.compression_min_bytes else None
+        try:
+            response, sent = self._send(url, headers, body, coding)
+            if response.status_code == 415 and coding is not None:
+                # Server rejected the content coding; stop compressing and resend as-is
+                logger.debug(f"Server rejected '{coding}' request bodies, disabling compression.")
+                self._coding = None
+                response, sent = self._send(url, headers, body, None)
+            response.raise_for_status()
+            content = response.content
+            data = self._loads(content)
+        except self._errors as e:
+            status_code = getattr(getattr(e, "response", None), "status_code", None)
+            raise APIError(f"Connection failed: {str(e)}", status_code=status_code)
+        except ValueError as e:
+            raise APIError(f"Invalid JSON response: {str(e)}")
+
+        if self.request_compression == "auto" and self._coding is None:
+            self._coding = _advertised_coding(response.headers.get("Accept-Encoding", ""))
+
+        wire = {
+            "bytes_sent": sent,
+            "bytes_uncompressed": len(body),
+            # Content-Length is the on-the-wire size even when the response was gzip-encoded
+            "bytes_received": int(response.headers.get("Content-Length") or len(content)),
+        }
+        with self._lock:
+            self._bytes_sent += wire["bytes_sent"]
+            self._bytes_uncompressed += wire["bytes_uncompressed"]
+            self._bytes_received += wire["bytes_received"]
+        return data, wire
+
+    def _send(self, url, headers, body: bytes, coding: Optional[str]):
+        headers = dict(headers)
+        if coding is not None:
+            body = _CODINGS[coding](body)
+            headers["Content-Encoding"] = coding
+        with self._lock:
+            self._requests += 1
+        if self.http2:
+            response = self._client.post(
+                url, headers=headers, content=body,
+                extensions={"trace": self._trace}
+            )
+        else:
+            response = self._client.post(url, headers=headers, data=body, timeout=self.timeout)
+        return response, len(body)
+
+    def preconnect(self, url: str) -> None:
+        """Open a connection to ``url`` ahead of the first real request."""
+        with self._lock:
+            self._requests += 1
+        try:
+            if self.http2:
+                self._client.head(url, extensions={"trace": self._trace})
+            else:
+                self._client.head(url, timeout=self.timeout)
+        except self._errors as e:
+            logger.debug(f"Pre-connect to {url} failed: {e}")
+
+    def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        # httpcore reports a TCP connect for every connection it opens
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._new_connections += 1
+
+    def _urllib3_connections(self) -> int:
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool-level counters.
+
+        ``reused_connections`` counts requests served over an already-open
+        connection rather than a fresh TCP/TLS handshake. The ``bytes_*``
+        totals are body sizes summed over all requests.
+        """
+        with self._lock:
+            total = self._requests
+            new = self._new_connections if self.http2 else self._urllib3_connections()
+            wire = {
+                "bytes_sent": self._bytes_sent,
+                "bytes_uncompressed": self._bytes_uncompressed,
+                "bytes_received": self._bytes_received,
+                "request_compression": self._coding,
+            }
+        return {
+            "requests": total,
+            "new_connections": new,
+            "reused_connections": max(total - new, 0),
+            "pool_size": self.pool_size,
+            **wire,
+        }
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        if not self._closed:
+            self._client.close()
+            self._closed = True
@@ -8,7 +8,10 @@ class AuthenticationError(ScaleDownError):
 
 class APIError(ScaleDownError):
     """Raised when the ScaleDown API returns an error."""
-    pass
+    def __init__(self, message: str = "", status_code=None):
+        super().__init__(message)
+        # HTTP status of the failed response, None for connection failures
+        self.status_code = status_code
 
 class OptimizerError(ScaleDownError):
     """Raised when an optimizer encounters an error."""
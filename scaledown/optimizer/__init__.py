@@ -1,9 +1,14 @@
 from typing import TYPE_CHECKING
 
 from .base import BaseOptimizer
+from .embedders import BaseEmbedder, HashingEmbedder, SentenceTransformerEmbedder
+from .embedding_cache import EmbeddingCache
 
 # Define what to expose
-__all__ = ["BaseOptimizer", "HasteOptimizer", "SemanticOptimizer"]
+__all__ = [
+    "BaseOptimizer", "BaseEmbedder", "HashingEmbedder", "SentenceTransformerEmbedder",
+    "EmbeddingCache", "HasteOptimizer", "SemanticOptimizer",
+]
 
 def __getattr__(name):
     if name == "HasteOptimizer":
@@ -8,7 +8,8 @@ class BaseOptimizer(ABC):
     Optimizers process raw context before compression.
     """
     
-    def __init__(self, api_key: Optional[str] = None, target_model:str="gpt-4o", **kwargs):
+    def __init__(self, api_key: Optional[str] = None, target_model:str="gpt-4o",
+                 token_counter: Optional[str] = None, **kwargs):
         """
         Initialize optimizer.
         
@@ -16,11 +17,16 @@ class BaseOptimizer(ABC):
         ----------
         api_key : str, optional
             API key for optimizer services (if needed)
+        target_model : str, default='gpt-4o'
+            Model whose tokenizer is used for metrics
+        token_counter : {'exact', 'approx'}, optional
+            Token counting mode for this step; defaults to the process-wide mode
         **kwargs : dict
             Additional optimizer-specific parameters
         """
         self.api_key = api_key or scaledown.get_api_key()
         self.target_model = target_model
+        self.token_counter = token_counter
         self.config = kwargs
     
     @abstractmethod
@@ -0,0 +1,284 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Tuple
+
+from . import model_registry
+
+_LOWER = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+
+
+class BaseEmbedder(ABC):
+    """
+    Embedding backend for ``SemanticOptimizer``.
+
+    ``name`` identifies the vector space: embeddings are cached and indexed
+    per name, so two embedders with the same name must produce comparable
+    vectors.
+    """
+    name: str = "base"
+
+    def load(self) -> Any:
+        """Prepare the backend and return the object whose ``encode`` is called."""
+        return self
+
+    @abstractmethod
+    def encode(self, texts: List[str]):
+        """Embed ``texts`` as a float32 array of shape ``(len(texts), dim)``."""
+        pass
+
+    def warmup(self) -> float:
+        """Load and run a dummy encode. Returns the seconds spent."""
+        import time
+
+        start = time.perf_counter()
+        self.load().encode(["def warmup():\n    return None"])
+        self._warm = True
+        return time.perf_counter() - start
+
+    @property
+    def ready(self) -> bool:
+        """True once the backend is loaded and warmed up."""
+        return getattr(self, "_warm", False)
+
+
+class SentenceTransformerEmbedder(BaseEmbedder):
+    """
+    Transformer embeddings via ``sentence-transformers``.
+
+    The model is shared process-wide through ``model_registry``. Requires
+    ``pip install scaledown[semantic]`` and, on first use, the model weights.
+    """
+
+    def __init__(self, model_name: str = "Qwen/Qwen3-Embedding-0.6B"):
+        self.model_name = model_name
+        self.name = model_name
+
+    def load(self):
+        import sentence_transformers  # noqa: F401  (ImportError means the extra is missing)
+        return model_registry.get_model(self.model_name)
+
+    def encode(self, texts: List[str]):
+        return self.load().encode(texts)
+
+    def warmup(self) -> float:
+        self.load()
+        return model_registry.warmup(self.model_name)
+
+    @property
+    def ready(self) -> bool:
+        return model_registry.is_ready(self.model_name)
+
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    Dependency-light lexical embedder for code; only needs NumPy.
+
+    Features are lower-cased character n-grams plus identifier tokens, with
+    identifiers also split on ``snake_case`` and ``camelCase`` boundaries.
+    Each feature is hashed to one of ``dim`` signed buckets, which is a
+    sparse random projection of the feature space to a dense vector. Counts
+    are log-scaled and rows L2-normalised, so L2 distance ranks like cosine
+    similarity. Both the n-gram and the identifier pass run as array
+    operations over all texts at once, with no per-text Python loop.
+
+    Nothing is downloaded and vectors are identical across processes and
+    machines, which makes it suitable for air-gapped and CPU-only nodes.
+    Quality is lexical: it matches shared names and vocabulary, not meaning.
+
+    Parameters
+    ----------
+    dim : int, default=512
+        Output dimensionality; a power of two.
+    ngram_range : (int, int), default=(3, 5)
+        Character n-gram lengths, inclusive.
+    identifier_weight : float, default=2.0
+        Weight of identifier and sub-word tokens relative to n-grams.
+    """
+
+    def __init__(self, dim: int = 512, ngram_range: Tuple[int, int] = (3, 5), identifier_weight: float = 2.0):
+        if dim < 2 or dim & (dim - 1) or not 1 <= ngram_range[0] <= ngram_range[1]:
+            raise ValueError("dim must be a power of two and ngram_range a valid (min, max) pair.")
+        self.dim = dim
+        self._bits = dim.bit_length() - 1
+        self.ngram_range = tuple(ngram_range)
+        self.identifier_weight = identifier_weight
+        # Bump the prefix whenever the features or hashing change, so cached
+        # embeddings from an older scheme are not mixed with new ones
+        self.name = f"hashing2-{dim}-{ngram_range[0]}-{ngram_range[1]}-{identifier_weight:g}"
+
+    def encode(self, texts: List[str]):
+        import numpy as np
+
+        n = len(texts)
+        counts = np.zeros(n * 2 * self.dim, dtype=np.float64)
+        if n:
+            self._add_ngrams(texts, counts)
+            self._add_identifiers(texts, counts)
+        signed = counts.reshape(n, 2, self.dim)
+        vectors = signed[:, 0] - signed[:, 1]
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def _add_ngrams(self, texts: List[str], counts) -> None:
+        import numpy as np
+
+        encoded = [t.encode("utf-8", "surrogatepass").translate(_LOWER) for t in texts]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint32)
+        owner = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+        # Characters left in the owning text from each position onwards
+        remaining = np.cumsum(lengths)[owner] - np.arange(len(data))
+
+        # FNV-1a over every window, vectorised across all positions of all
+        # texts; the hash of an n-gram extends that of its (n-1)-gram prefix
+        low, high = self.ngram_range
+        h = np.full(len(data), 2166136261, dtype=np.uint32)
+        owners, hashes = [], []
+        for size in range(1, high + 1):
+            m = len(data) - size + 1
+            if m <= 0:
+                break
+            h = h[:m]
+            h ^= data[size - 1:size - 1 + m]
+            h *= np.uint32(16777619)
+            if size >= low:
+                valid = remaining[:m] >= size
+                owners.append(owner[:m][valid])
+                hashes.append(h[valid] ^ np.uint32(size))
+        if hashes:
+            self._accumulate(np.concatenate(owners), np.concatenate(hashes), 1.0, counts)
+
+    def _add_identifiers(self, texts: List[str], counts) -> None:
+        import numpy as np
+
+        # Identifiers and their sub-words are found and hashed with array
+        # operations over all texts at once, one separator byte between texts
+        raw = [t.encode("utf-8", "surrogatepass") for t in texts]
+        lengths = np.fromiter((len(b) for b in raw), dtype=np.int64, count=len(raw))
+        data = np.frombuffer(b"\n".join(raw), dtype=np.uint8)
+        if not len(data):
+            return
+        owner = np.repeat(np.arange(len(raw), dtype=np.int64), lengths + 1)[:len(data)]
+
+        upper = (data >= 65) & (data <= 90)
+        lower = (data >= 97) & (data <= 122)
+        digit = (data >= 48) & (data <= 57)
+        under = data == 95
+        word = upper | lower | digit | under
+
+        # Identifiers are runs of word characters minus any leading digits
+        run_starts = np.flatnonzero(word & ~_shift(word, 1))
+        run_ends = np.flatnonzero(word & ~_shift(word, -1)) + 1
+        non_digit = np.flatnonzero(word & ~digit)
+        first = np.searchsorted(non_digit, run_starts)
+        ident_starts = np.where(first < len(non_digit), non_digit[np.minimum(first, len(non_digit) - 1)], run_ends)
+        ident_starts = np.minimum(ident_starts, run_ends)
+        ident = word
+        leading = ident_starts > run_starts
+        if leading.any():
+            marker = np.zeros(len(data) + 1, dtype=np.int32)
+            np.add.at(marker, run_starts[leading], 1)
+            np.add.at(marker, ident_starts[leading], -1)
+            ident = word & (np.cumsum(marker[:-1]) == 0)
+        keep = ident_starts < run_ends
+        ident_starts, ident_ends = ident_starts[keep], run_ends[keep]
+        ident_start = np.zeros(len(data), dtype=bool)
+        ident_start[ident_starts] = True
+        ident_end = word & ~_shift(word, -1)
+
+        # Sub-words split on underscores, digit/letter changes, "aB" and "ABc"
+        sub = ident & ~under
+        letter = upper | lower
+        sub_start = sub & (
+            ~_shift(sub, 1)
+            | (_shift(lower, 1) & upper)
+            | (_shift(upper, 1) & upper & _shift(lower, -1))
+            | (_shift(digit, 1) & letter) | (_shift(letter, 1) & digit)
+        )
+        sub_end = sub & (~_shift(sub, -1) | _shift(sub_start, -1))
+        sub_starts, sub_ends = np.flatnonzero(sub_start), np.flatnonzero(sub_end) + 1
+        # A sub-word spanning its whole identifier is the identifier itself
+        partial = ~(ident_start[sub_starts] & ident_end[sub_ends - 1])
+
+        starts = np.concatenate([ident_starts, sub_starts[partial]])
+        ends = np.concatenate([ident_ends, sub_ends[partial]])
+        lowered = np.where(upper, data + 32, data).astype(np.uint32)
+        hashes = _substring_hashes(lowered, starts, ends)
+        self._accumulate(owner[starts], hashes, self.identifier_weight, counts)
+
+    def _accumulate(self, owners, hashes, weight: float, counts) -> None:
+        import numpy as np
+
+        # Fibonacci hashing: the top bits of ``h * 2**32/phi`` pick one of
+        # ``2 * dim`` slots, the upper half holding negatively signed features
+        slots = (hashes * np.uint32(0x9E3779B1)) >> np.uint32(31 - self._bits)
+        binned = np.bincount(owners * (2 * self.dim) + slots, minlength=len(counts))
+        counts += binned if weight == 1.0 else weight * binned
+
+
+def _shift(mask, offset: int):
+    """``mask`` moved ``offset`` places right (positive) or left, padded with False."""
+    import numpy as np
+
+    out = np.zeros_like(mask)
+    if offset > 0:
+        out[offset:] = mask[:-offset]
+    else:
+        out[:offset] = mask[-offset:]
+    return out
+
+
+_HASH_BASE = 16777619
+_powers = None
+
+
+def _power_tables(n: int):
+    """``P**j`` and ``P**-j`` modulo 2**32 for ``j < n``, grown and kept for reuse."""
+    global _powers
+    import numpy as np
+
+    if _powers is None or len(_powers[0]) < n:
+        size = max(n, 2 * len(_powers[0]) if _powers is not None else 1 << 16)
+        tables = []
+        for base in (_HASH_BASE, pow(_HASH_BASE, -1, 2 ** 32)):
+            table = np.empty(size, dtype=np.uint32)
+            table[0] = 1
+            np.cumprod(np.full(size - 1, base, dtype=np.uint32), dtype=np.uint32, out=table[1:])
+            tables.append(table)
+        _powers = tuple(tables)
+    return _powers
+
+
+def _substring_hashes(data, starts, ends):
+    """
+    Hash ``data[s:e]`` for every ``(s, e)`` pair in O(len(data)) total.
+
+    Uses a polynomial hash modulo 2**32 over prefix sums: with ``Q`` the
+    inverse of the odd base ``P``, ``sum(data[j] * Q**j for j in [s, e))``
+    scaled by ``P**s`` depends only on the substring, not on where it is.
+    A Murmur3 finaliser then mixes the bits.
+    """
+    import numpy as np
+
+    powers, inverse = _power_tables(len(data))
+    prefix = np.concatenate([np.zeros(1, dtype=np.uint32), np.cumsum(data * inverse[:len(data)], dtype=np.uint32)])
+
+    h = (prefix[ends] - prefix[starts]) * powers[starts]
+    h ^= (ends - starts).astype(np.uint32) * np.uint32(0x9E3779B1)
+    h ^= h >> np.uint32(16)
+    h *= np.uint32(0x85EBCA6B)
+    h ^= h >> np.uint32(13)
+    h *= np.uint32(0xC2B2AE35)
+    h ^= h >> np.uint32(16)
+    return h
+
+
+def make_embedder(embedder, model_name: str) -> BaseEmbedder:
+    """Resolve ``SemanticOptimizer``'s ``embedder`` argument."""
+    if embedder is None or embedder == "sentence-transformers":
+        return SentenceTransformerEmbedder(model_name)
+    if embedder == "hashing":
+        return HashingEmbedder()
+    if isinstance(embedder, BaseEmbedder):
+        return embedder
+    raise ValueError("embedder must be None, 'sentence-transformers', 'hashing' or a BaseEmbedder.")
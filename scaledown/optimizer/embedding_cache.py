@@ -0,0 +1,176 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+def embedding_key(text: str) -> str:
+    """Content hash identifying ``text`` in an embedding store."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def model_directory(root: str, model_name: str) -> str:
+    """Per-model subdirectory of ``root``, safe for any model name."""
+    return os.path.join(root, re.sub(r"[^\w.-]+", "_", model_name))
+
+
+class EmbeddingCache:
+    """
+    Content-addressed store of embedding vectors for one model.
+
+    With a ``path`` the vectors live in a memory-mapped float32 matrix
+    (``vectors.f32``) next to a small SQLite index mapping content hashes to
+    rows, under a per-model directory. Appends take SQLite's write lock, so
+    several processes can share one store. Without a ``path`` vectors are
+    kept in process memory only.
+
+    Parameters
+    ----------
+    model_name : str
+        Embedding model the vectors belong to. Each model gets its own store.
+    path : str, optional
+        Root directory for on-disk stores.
+    """
+
+    def __init__(self, model_name: str, path: Optional[str] = None):
+        self.model_name = model_name
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory: Dict[str, Any] = {}
+        self._dim: Optional[int] = None
+        self._matrix = None
+        self._conn = None
+        if path is None:
+            return
+
+        directory = model_directory(path, model_name)
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(directory, "keys.sqlite"), check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+            self._conn.commit()
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            self._dim = int(row[0]) if row else None
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        """Return the stored vectors for whichever of ``keys`` are present."""
+        with self._lock:
+            if self._conn is None:
+                found = {k: self._memory[k] for k in keys if k in self._memory}
+            else:
+                found = self._read(keys)
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+            return found
+
+    def put_many(self, keys: Sequence[str], vectors) -> None:
+        """Store one vector per key. Keys already present are left as they are."""
+        import numpy as np
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self._conn is None:
+                for key, vector in zip(keys, vectors):
+                    self._memory.setdefault(key, vector)
+                return
+            self._append(list(keys), vectors)
+
+    def _read(self, keys: Sequence[str]) -> Dict[str, Any]:
+        rows: Dict[str, int] = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            rows.update(self._conn.execute(
+                f"SELECT key, row FROM keys WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        if not rows:
+            return {}
+        matrix = self._map(max(rows.values()) + 1)
+        return {key: matrix[row] for key, row in rows.items()}
+
+    def _append(self, keys: List[str], vectors) -> None:
+        # BEGIN IMMEDIATE serialises writers across processes; rows become
+        # visible to readers only after the vectors are on disk
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            if row is None:
+                self._conn.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (str(vectors.shape[1]),))
+                self._dim = vectors.shape[1]
+            else:
+                self._dim = int(row[0])
+            if vectors.shape[1] != self._dim:
+                raise ValueError(f"Expected {self._dim}-dimensional vectors for {self.model_name}, got {vectors.shape[1]}.")
+
+            present = set(self._read_keys(keys))
+            new = [(k, v) for k, v in OrderedDict(zip(keys, vectors)).items() if k not in present]
+            if new:
+                next_row = self._conn.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+                mode = "r+b" if os.path.exists(self._vectors_path) else "wb"
+                with open(self._vectors_path, mode) as f:
+                    f.seek(next_row * self._dim * 4)
+                    for _, vector in new:
+                        f.write(vector.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._conn.executemany(
+                    "INSERT INTO keys (key, row) VALUES (?, ?)",
+                    [(k, next_row + i) for i, (k, _) in enumerate(new)]
+                )
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+
+    def _read_keys(self, keys: List[str]) -> List[str]:
+        present: List[str] = []
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            present.extend(r[0] for r in self._conn.execute(
+                f"SELECT key FROM keys WHERE key IN ({','.join('?' * len(batch))})", batch
+            ))
+        return present
+
+    def _map(self, rows: int):
+        """Memory-map at least ``rows`` rows, remapping if another writer grew the file."""
+        import numpy as np
+
+        if self._dim is None:
+            self._dim = int(self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()[0])
+        if self._matrix is None or self._matrix.shape[0] < rows:
+            size = os.path.getsize(self._vectors_path) // (self._dim * 4)
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(size, self._dim))
+        return self._matrix
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._conn is None:
+                return len(self._memory)
+            return self._conn.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and hit/miss counters."""
+        entries = len(self)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """Release the memory map and database connection."""
+        with self._lock:
+            self._matrix = None
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -162,9 +162,11 @@ class HasteOptimizer(BaseOptimizer):
             if file_path and os.path.exists(file_path):
                 with open(file_path, 'r', encoding='utf-8') as f:
                     original_code = f.read()
-                original_tokens = count_tokens(original_code, model=self.target_model)
+                # Reuse the caller's cached count when the context is this file
+                source = context if context == original_code else original_code
+                original_tokens = count_tokens(source, model=self.target_model, counter=self.token_counter)
             
-            optimized_tokens = count_tokens(optimized_content, model=self.target_model)
+            optimized_tokens = count_tokens(optimized_content, model=self.target_model, counter=self.token_counter)
             
             metrics = OptimizerMetrics(
                 original_tokens=original_tokens,
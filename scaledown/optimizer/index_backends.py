@@ -0,0 +1,313 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Tuple
+
+# Policy thresholds, from ``python -m scaledown.testing.index_benchmark`` on
+# clustered 384-d vectors (single core, recall@10, 50 batched queries):
+#
+#   units    exact query   hnsw build / query   ivfpq build / query / recall
+#   1k       0.02 ms       67 ms / 0.03 ms      0.2 s / 0.12 ms / 0.47
+#   20k      0.49 ms       2.3 s / 0.08 ms      56 s / 0.24 ms / 0.66
+#   100k     2.25 ms       20 s  / 0.09 ms      77 s / 0.39 ms / 0.52
+#
+# Exact search needs no build and stays around half a millisecond per query
+# up to ~20k units; past that HNSW's build cost pays off quickly and its
+# recall stays ~1.0. IVF-PQ only makes sense when HNSW's float32 graph no
+# longer fits in memory and a recall around 0.5 is acceptable.
+EXACT_MAX_UNITS = 20_000
+HNSW_MAX_UNITS = 500_000
+IVFPQ_RECALL = 0.5
+# HNSW removals only mark vectors deleted; past this fraction of the graph
+# the filtered searches degrade enough that a rebuild is cheaper
+HNSW_MAX_DELETED = 0.2
+
+BACKENDS = ("exact", "hnsw", "ivfpq")
+
+
+def select_backend(n_units: int, recall_target: float = 0.95) -> str:
+    """
+    Pick a backend name for a corpus of ``n_units`` vectors.
+
+    Parameters
+    ----------
+    n_units : int
+        Number of vectors in the index.
+    recall_target : float, default=0.95
+        Minimum acceptable recall@k. ``1.0`` always uses exact search; values
+        above 0.95 keep exact search for corpora up to ten times larger.
+        IVF-PQ is only chosen for very large corpora when the target is at
+        most ``IVFPQ_RECALL``.
+    """
+    if recall_target >= 1.0:
+        return "exact"
+    exact_max = EXACT_MAX_UNITS * (10 if recall_target > 0.95 else 1)
+    if n_units <= exact_max:
+        return "exact"
+    if n_units > HNSW_MAX_UNITS and recall_target <= IVFPQ_RECALL:
+        return "ivfpq"
+    return "hnsw"
+
+
+def make_backend(name: str, recall_target: float = 0.95) -> "VectorBackend":
+    """Instantiate the backend called ``name``."""
+    if name == "exact":
+        return ExactBackend()
+    if name == "hnsw":
+        # Wider beam for stricter recall targets
+        return HNSWBackend(ef_search=128 if recall_target > 0.95 else 64)
+    if name == "ivfpq":
+        return IVFPQBackend()
+    raise ValueError(f"backend must be one of {BACKENDS} or 'auto'.")
+
+
+class VectorBackend(ABC):
+    """
+    Nearest-neighbour search over ID-labelled float32 vectors (squared L2).
+
+    Backends are rebuilt from the full vector set with ``build``. Those that
+    can, also apply ``add``/``remove`` in place; the others return ``False``
+    and the caller rebuilds. ``incremental`` tells a caller that owns the
+    full vector set whether patching is cheaper than rebuilding lazily.
+    """
+    name = "base"
+    incremental = True
+
+    @abstractmethod
+    def build(self, ids, vectors) -> None:
+        """Index exactly these vectors, replacing any previous contents."""
+        pass
+
+    def add(self, ids, vectors) -> bool:
+        """Add vectors in place. Returns False if the backend must be rebuilt instead."""
+        return False
+
+    def remove(self, ids) -> bool:
+        """Remove vectors in place. Returns False if the backend must be rebuilt instead."""
+        return False
+
+    @abstractmethod
+    def search(self, queries, k: int, ids: Optional[Sequence[int]] = None) -> Tuple:
+        """
+        ``(distances, labels)`` arrays of shape ``(len(queries), k)``, best
+        first, restricted to ``ids`` if given. Missing results are labelled -1.
+        """
+        pass
+
+
+class ExactBackend(VectorBackend):
+    """Brute-force search: one matrix product and an ``argpartition`` top-k."""
+    name = "exact"
+    # A rebuild is one pass over the vectors, while each in-place add or
+    # remove copies all of them
+    incremental = False
+
+    def __init__(self):
+        self._ids = None
+        self._vectors = None
+        self._norms = None
+
+    def build(self, ids, vectors) -> None:
+        import numpy as np
+
+        self._ids = np.asarray(ids, dtype=np.int64)
+        self._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._norms = np.einsum("ij,ij->i", self._vectors, self._vectors)
+
+    def add(self, ids, vectors) -> bool:
+        import numpy as np
+
+        if self._ids is None:
+            self.build(ids, vectors)
+            return True
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+        self._vectors = np.concatenate([self._vectors, vectors])
+        self._norms = np.concatenate([self._norms, np.einsum("ij,ij->i", vectors, vectors)])
+        return True
+
+    def remove(self, ids) -> bool:
+        import numpy as np
+
+        if self._ids is not None:
+            keep = ~np.isin(self._ids, np.asarray(ids, dtype=np.int64))
+            self._ids, self._vectors, self._norms = self._ids[keep], self._vectors[keep], self._norms[keep]
+        return True
+
+    def search(self, queries, k: int, ids: Optional[Sequence[int]] = None) -> Tuple:
+        import numpy as np
+
+        queries = np.asarray(queries, dtype=np.float32)
+        labels, vectors, norms = self._ids, self._vectors, self._norms
+        if ids is not None and labels is not None:
+            mask = np.isin(labels, np.asarray(ids, dtype=np.int64))
+            labels, vectors, norms = labels[mask], vectors[mask], norms[mask]
+        return exact_search(queries, labels, vectors, k, norms)
+
+
+def exact_search(queries, labels, vectors, k: int, norms=None) -> Tuple:
+    """Squared-L2 top-k of ``queries`` against labelled ``vectors``."""
+    import numpy as np
+
+    n_queries = len(queries)
+    out_d = np.full((n_queries, k), np.inf, dtype=np.float32)
+    out_i = np.full((n_queries, k), -1, dtype=np.int64)
+    if labels is None or len(labels) == 0 or k < 1:
+        return out_d, out_i
+    if norms is None:
+        norms = np.einsum("ij,ij->i", vectors, vectors)
+
+    # |q - x|^2 = |q|^2 - 2 q.x + |x|^2
+    distances = norms[None, :] - 2.0 * (queries @ vectors.T)
+    distances += np.einsum("ij,ij->i", queries, queries)[:, None]
+    np.maximum(distances, 0, out=distances)
+
+    top = min(k, len(labels))
+    if top < len(labels):
+        part = np.argpartition(distances, top - 1, axis=1)[:, :top]
+    else:
+        part = np.broadcast_to(np.arange(top), (n_queries, top))
+    part_d = np.take_along_axis(distances, part, axis=1)
+    order = np.argsort(part_d, axis=1, kind="stable")
+    out_d[:, :top] = np.take_along_axis(part_d, order, axis=1)
+    out_i[:, :top] = labels[np.take_along_axis(part, order, axis=1)]
+    return out_d, out_i
+
+
+class _FaissBackend(VectorBackend):
+    def __init__(self):
+        self.index = None
+        # IDs still in ``index`` but removed since; excluded from every search
+        self.deleted = set()
+
+    def search(self, queries, k: int, ids: Optional[Sequence[int]] = None) -> Tuple:
+        import faiss
+        import numpy as np
+
+        queries = np.asarray(queries, dtype=np.float32)
+        if self.index is None or self.index.ntotal == 0:
+            return exact_search(queries, None, None, k)
+        if ids is not None:
+            sel = faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64))
+        elif self.deleted:
+            sel = faiss.IDSelectorNot(faiss.IDSelectorBatch(np.fromiter(self.deleted, dtype=np.int64)))
+        else:
+            sel = None
+        return self.index.search(queries, k, params=self._params(sel))
+
+    def _params(self, sel):
+        return None
+
+
+class HNSWBackend(_FaissBackend):
+    """
+    Graph-based approximate search (``faiss.IndexHNSWFlat``).
+
+    Supports in-place adds. Removed vectors stay in the graph but are
+    filtered out of searches; once they exceed ``HNSW_MAX_DELETED`` of it
+    the graph is rebuilt.
+
+    Parameters
+    ----------
+    m : int, default=32
+        Graph degree.
+    ef_construction : int, default=80
+        Beam width while building.
+    ef_search : int, default=64
+        Beam width while searching; higher trades latency for recall.
+    """
+    name = "hnsw"
+
+    def __init__(self, m: int = 32, ef_construction: int = 80, ef_search: int = 64):
+        super().__init__()
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+
+    def build(self, ids, vectors) -> None:
+        import faiss
+        import numpy as np
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        hnsw = faiss.IndexHNSWFlat(vectors.shape[1], self.m)
+        hnsw.hnsw.efConstruction = self.ef_construction
+        self.index = faiss.IndexIDMap2(hnsw)
+        self.index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+        self.deleted = set()
+
+    def add(self, ids, vectors) -> bool:
+        import numpy as np
+
+        if self.index is None:
+            self.build(ids, vectors)
+        else:
+            self.index.add_with_ids(np.asarray(vectors, dtype=np.float32), np.asarray(ids, dtype=np.int64))
+        return True
+
+    def remove(self, ids) -> bool:
+        # HNSW graphs cannot drop nodes; hide them until enough pile up
+        if self.index is None:
+            return False
+        self.deleted.update(int(i) for i in ids)
+        return len(self.deleted) <= HNSW_MAX_DELETED * self.index.ntotal
+
+    def _params(self, sel):
+        import faiss
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=self.ef_search)
+
+
+class IVFPQBackend(_FaissBackend):
+    """
+    Inverted lists over product-quantised codes (``faiss.IndexIVFPQ``).
+
+    Stores a few bytes per vector instead of ``4 * dim``, for corpora too
+    large to hold uncompressed. Supports in-place adds and removals; the
+    quantisers are trained on the vectors present at build time.
+
+    Parameters
+    ----------
+    nlist : int, optional
+        Number of inverted lists. Defaults to ``4 * sqrt(n)``.
+    nprobe : int, default=16
+        Lists visited per query; higher trades latency for recall.
+    """
+    name = "ivfpq"
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 16):
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+
+    def build(self, ids, vectors) -> None:
+        import faiss
+        import numpy as np
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        # faiss wants ~39 training points per centroid, both for the coarse
+        # quantiser and for each of the 2**nbits PQ centroids
+        nlist = self.nlist or max(1, min(int(4 * math.sqrt(n)), n // 39))
+        nbits = max(1, min(8, int(math.log2(max(n // 39, 2)))))
+        m = next(c for c in (64, 48, 32, 16, 8, 4, 2, 1) if dim % c == 0 and c <= dim)
+        self.index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, m, nbits)
+        self.index.train(vectors)
+        self.index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+
+    def add(self, ids, vectors) -> bool:
+        import numpy as np
+
+        if self.index is None:
+            return False
+        self.index.add_with_ids(np.asarray(vectors, dtype=np.float32), np.asarray(ids, dtype=np.int64))
+        return True
+
+    def remove(self, ids) -> bool:
+        import faiss
+        import numpy as np
+
+        if self.index is not None:
+            self.index.remove_ids(faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64)))
+        return True
+
+    def _params(self, sel):
+        import faiss
+        return faiss.SearchParametersIVF(sel=sel, nprobe=self.nprobe)
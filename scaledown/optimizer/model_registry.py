@@ -0,0 +1,89 @@
+"""
+Process-wide registry of embedding models.
+
+Every ``SemanticOptimizer`` using the same ``model_name`` shares one loaded
+``SentenceTransformer``. Loading is thread-safe: concurrent first callers
+wait for a single load instead of each loading a copy. Call ``warmup()`` at
+start-up so the first request does not pay for loading, and ``is_ready()``
+from a readiness probe.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_model_locks: Dict[str, threading.Lock] = {}
+_models: Dict[str, Any] = {}
+_info: Dict[str, Dict[str, Any]] = {}
+
+
+def _load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def get_model(model_name: str, loader: Optional[Callable[[str], Any]] = None):
+    """
+    Return the shared model for ``model_name``, loading it on first use.
+
+    Load errors propagate to the caller and are not cached, so a later call
+    retries (e.g. once the network is back).
+
+    Parameters
+    ----------
+    model_name : str
+        Model identifier, e.g. ``'Qwen/Qwen3-Embedding-0.6B'``.
+    loader : callable, optional
+        ``loader(model_name)`` builds the model. Defaults to
+        ``SentenceTransformer(model_name)``.
+    """
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _lock:
+        model_lock = _model_locks.setdefault(model_name, threading.Lock())
+    with model_lock:
+        model = _models.get(model_name)
+        if model is None:
+            logger.info(f"Loading embedding model: {model_name}...")
+            start = time.perf_counter()
+            model = (loader or _load_sentence_transformer)(model_name)
+            _info[model_name] = {"load_seconds": time.perf_counter() - start, "warm": False}
+            _models[model_name] = model
+    return model
+
+
+def warmup(model_name: str, loader: Optional[Callable[[str], Any]] = None) -> float:
+    """
+    Load ``model_name`` and run a dummy encode so lazy initialisation
+    (weights, kernels, tokenizer caches) happens now rather than on the
+    first real request. Returns the seconds spent.
+    """
+    start = time.perf_counter()
+    model = get_model(model_name, loader=loader)
+    model.encode(["def warmup():\n    return None"])
+    _info[model_name]["warm"] = True
+    return time.perf_counter() - start
+
+
+def is_ready(model_name: str) -> bool:
+    """True once ``model_name`` is loaded and has been warmed up."""
+    return model_name in _models and _info.get(model_name, {}).get("warm", False)
+
+
+def status() -> Dict[str, Dict[str, Any]]:
+    """Loaded models with their load time and warm-up state."""
+    return {name: dict(info) for name, info in _info.items() if name in _models}
+
+
+def release(model_name: Optional[str] = None) -> None:
+    """Drop ``model_name`` (or every model) from the registry so it can be garbage collected."""
+    with _lock:
+        names = [model_name] if model_name is not None else list(_models)
+        for name in names:
+            _models.pop(name, None)
+            _info.pop(name, None)
@@ -1,164 +1,384 @@
 import os
 import ast
+import glob
 import logging
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Optional, Union
 from pathlib import Path
 
 from scaledown.optimizer.base import BaseOptimizer
+from scaledown.optimizer.embedders import BaseEmbedder, make_embedder
+from scaledown.optimizer.embedding_cache import EmbeddingCache, embedding_key, model_directory
+from scaledown.optimizer.vector_index import CodeIndex
 from scaledown.types import OptimizedContext
-from scaledown.types.metrics import OptimizerMetrics, count_tokens
+from scaledown.types.metrics import OptimizerMetrics, count_tokens, get_token_counter
 from scaledown.exceptions import OptimizerError
 
 logger = logging.getLogger(__name__)
 
+# Below this many changed files, process start-up costs more than parsing
+_PARALLEL_PARSE_MIN_FILES = 8
+
+# Candidates retrieved per requested unit, so that dropping overlapping units
+# and units that do not fit the token budget still leaves enough to choose from
+_CANDIDATES_PER_UNIT = 4
+
+_SEPARATOR = "\n\n# ... [Semantic Context Search Result] ...\n\n"
+
 class SemanticOptimizer(BaseOptimizer):
     """
     An optimizer that uses local embeddings and FAISS to find semantically 
     relevant code chunks (functions/classes) for a given query.
+
+    Embeddings come from a pluggable ``BaseEmbedder``: a SentenceTransformer
+    model by default, or ``embedder='hashing'`` for a fast lexical embedder
+    that needs no model download (air-gapped or CPU-only deployments).
+
+    Code units are embedded once per distinct content: embeddings are kept
+    in an ``EmbeddingCache`` keyed by content hash, so only new or edited
+    functions and classes are encoded on later calls.
+
+    Results are packed best-first: a unit nested in one already selected
+    (a method of a selected class) is skipped, as is a parent whose
+    children were already selected, and with ``max_tokens`` units that no
+    longer fit the budget are skipped too. The tokens the overlap checks
+    kept out are reported as ``metrics.dedup_tokens_saved``.
+
+    Parameters
+    ----------
+    model_name : str, default='Qwen/Qwen3-Embedding-0.6B'
+        SentenceTransformer model used for embeddings by the default embedder.
+    top_k : int, default=3
+        Number of code units to return.
+    target_model : str, default='gpt-4o'
+        Model whose tokenizer is used for metrics.
+    cache_dir : str, optional
+        Directory for a persistent embedding store shared across processes.
+        Without it embeddings are cached in memory for this instance.
+    query_cache_size : int, default=256
+        Number of recent query embeddings kept in an LRU. ``0`` disables it.
+    index_dir : str, optional
+        Directory to persist the vector index and its file manifest in, so a
+        restarted process only re-indexes files edited in the meantime.
+        Without it the index is kept in memory for this instance.
+    parse_workers : int, optional
+        Processes used to parse changed files when indexing many at once.
+        Defaults to the CPU count; ``1`` parses on the calling thread.
+    index_backend : str, default='auto'
+        Search backend: ``'exact'`` (NumPy), ``'hnsw'``, ``'ivfpq'`` or
+        ``'auto'`` to choose from the corpus size and ``recall_target``.
+    recall_target : float, default=0.95
+        Minimum recall@k the automatic backend choice must deliver.
+    embedder : str or BaseEmbedder, optional
+        ``'sentence-transformers'`` (the default, using ``model_name``),
+        ``'hashing'`` for ``HashingEmbedder()``, or any ``BaseEmbedder``.
     """
 
-    def __init__(self, model_name: str = "Qwen/Qwen3-Embedding-0.6B", top_k: int = 3, target_model: str = "gpt-4o", **kwargs):
+    def __init__(self, model_name: str = "Qwen/Qwen3-Embedding-0.6B", top_k: int = 3, target_model: str = "gpt-4o",
+                 cache_dir: Optional[str] = None, query_cache_size: int = 256,
+                 index_dir: Optional[str] = None, parse_workers: Optional[int] = None,
+                 index_backend: str = "auto", recall_target: float = 0.95,
+                 embedder: Optional[Union[str, BaseEmbedder]] = None, **kwargs):
         super().__init__(target_model=target_model, **kwargs)
         self.model_name = model_name
+        self.embedder = make_embedder(embedder, model_name)
         self.top_k = top_k
+        self.embedding_cache = EmbeddingCache(self.embedder.name, path=cache_dir)
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, Any]" = OrderedDict()
+        # Vectors are only comparable within one embedder, so each gets its own index
+        self.index = CodeIndex(
+            model_directory(index_dir, self.embedder.name) if index_dir else None,
+            backend=index_backend, recall_target=recall_target
+        )
+        self.parse_workers = parse_workers
         self._model = None
-        self._faiss = None
         self._numpy = None
         self.model_load_failed = False
 
     def _lazy_load_deps(self):
-        """Lazily import heavy ML dependencies."""
+        """Lazily import heavy ML dependencies and load the embedder."""
         if self._model is not None or self.model_load_failed:
             return
 
         try:
-            from sentence_transformers import SentenceTransformer
-            import faiss
             import numpy as np
+            model = self.embedder.load()
         except ImportError as e:
             raise OptimizerError(
                 "SemanticOptimizer requires 'sentence-transformers', 'faiss-cpu', and 'numpy'. "
                 "Install them with: pip install scaledown[semantic]"
             ) from e
-
-        logger.info(f"Loading embedding model: {self.model_name}...")
-        try:
-            self._model = SentenceTransformer(self.model_name)
-            self._faiss = faiss
-            self._numpy = np
         except Exception as e:
             # Catch any error during model loading (Network, File missing, etc.)
             logger.error(f"Failed to load semantic model: {e}")
             logger.warning("Falling back to pass-through mode.")
             self.model_load_failed = True
+        else:
+            self._model = model
+            self._numpy = np
+
+    def warmup(self) -> float:
+        """
+        Load the embedder now and run a dummy encode, so the first
+        ``optimize`` call does not pay for it. Returns the seconds spent.
+        """
+        self._lazy_load_deps()
+        if self.model_load_failed:
+            raise OptimizerError(f"Embedder {self.embedder.name!r} failed to load.")
+        return self.embedder.warmup()
+
+    @property
+    def ready(self) -> bool:
+        """True once the embedder is loaded and warmed up."""
+        return self.embedder.ready
 
     def _extract_semantic_units(self, file_path: str) -> List[Dict[str, Any]]:
         """Extracts functions and classes using AST."""
         try:
             with open(file_path, "r", encoding="utf-8") as f:
                 source = f.read()
-            
-            tree = ast.parse(source)
-            units = []
-
-            # Add the full file context
-            units.append({
-                "type": "file",
-                "name": os.path.basename(file_path),
-                "code": source,
-                "metadata": {"file_name": os.path.basename(file_path)}
-            })
-
-            # Walk AST for Classes and Functions
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    units.append({
-                        "type": "class",
-                        "name": node.name,
-                        "code": ast.get_source_segment(source, node),
-                        "metadata": {"file_name": os.path.basename(file_path)}
-                    })
-                elif isinstance(node, ast.FunctionDef):
-                    units.append({
-                        "type": "function",
-                        "name": node.name,
-                        "code": ast.get_source_segment(source, node),
-                        "metadata": {"file_name": os.path.basename(file_path)}
-                    })
-            return units
         except Exception as e:
             raise OptimizerError(f"Failed to parse AST for {file_path}: {e}")
+        return self._parse_units(source, file_path)
+
+    def _parse_units(self, source: str, file_path: str) -> List[Dict[str, Any]]:
+        return _parse_source(source, file_path)
+
+    def _resolve_paths(self, file_path: Union[str, List[str]]) -> List[str]:
+        """Expand a file, directory, glob pattern or list of them into Python files."""
+        if isinstance(file_path, (list, tuple)):
+            paths = [p for item in file_path for p in self._resolve_paths(item)]
+        elif os.path.isdir(file_path):
+            paths = []
+            for root, dirs, files in os.walk(file_path):
+                # Skip hidden directories (.git, .venv, ...) and bytecode caches
+                dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+                paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(".py"))
+        elif glob.has_magic(file_path):
+            paths = sorted(p for p in glob.glob(file_path, recursive=True) if os.path.isfile(p))
+        else:
+            paths = [file_path]
+        return list(dict.fromkeys(os.path.abspath(p) for p in paths))
+
+    def _forget_deleted(self, file_path: Union[str, List[str]], paths: List[str]) -> None:
+        """Drop indexed files under a searched directory or pattern that no longer exist."""
+        roots = tuple(os.path.join(root, "") for root in _search_roots(file_path))
+        if not roots:
+            return
+        found = set(paths)
+        for path in self.index.files():
+            if path.startswith(roots) and path not in found and not os.path.isfile(path):
+                self.index.remove_file(path)
+
+    def _sync_files(self, paths: List[str], strict: bool = True):
+        """
+        Make sure every file in ``paths`` is indexed, re-parsing only changed ones.
+
+        Changed files are parsed in a process pool when there are enough of
+        them. Returns manifest entries and, for files that had to be read,
+        their source (keyed by path).
+        """
+        entries: Dict[str, Dict[str, Any]] = {}
+        stale: List[str] = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                if strict:
+                    raise OptimizerError(f"Failed to parse AST for {path}: {e}") from e
+                self.index.remove_file(path)
+                continue
+            if self.index.is_current(path, stat):
+                entries[path] = self.index.entry(path)
+            else:
+                stale.append(path)
+
+        if len(stale) >= _PARALLEL_PARSE_MIN_FILES and self.parse_workers != 1:
+            workers = min(self.parse_workers or os.cpu_count() or 1, len(stale))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parsed = list(pool.map(_parse_file, stale, chunksize=max(1, len(stale) // (workers * 4))))
+        else:
+            parsed = [_parse_file(path) for path in stale]
+
+        sources: Dict[str, str] = {}
+        for path, stat, source, units, error in parsed:
+            if error is not None:
+                if strict:
+                    raise OptimizerError(error)
+                logger.warning(f"Skipping file: {error}")
+                continue
+            units = [u for u in units if u.get("code") and u.get("type") != "file"]
+            entries[path] = self.index.update_file(
+                path, stat, embedding_key(source), units, self._embed_units,
+                count=self._count_codes, token_key=self._token_key()
+            )
+            sources[path] = source
+        return entries, sources
+
+    def _pass_through(self, paths: List[str], max_tokens: Optional[int]):
+        """
+        Whole files, in order, while they fit in ``max_tokens``, for when no
+        embedder is available. Unparsable files are skipped as in a search.
+        Returns the content, the token count of all readable files and that
+        of the content.
+        """
+        if max_tokens is None:
+            raise OptimizerError(
+                f"Embedder {self.embedder.name!r} failed to load; refusing to pass through "
+                f"{len(paths)} files unfiltered. Pass max_tokens to cap the fallback."
+            )
+        blocks, used, orig_tokens = [], 0, 0
+        for path, _, source, _, error in map(_parse_file, paths):
+            if error is not None:
+                logger.warning(f"Skipping file: {error}")
+                continue
+            block = f"# {path}\n{source}"
+            tokens = count_tokens(block, model=self.target_model, counter=self.token_counter)
+            orig_tokens += tokens
+            if used + tokens <= max_tokens:
+                blocks.append(block)
+                used += tokens
+        content = "\n\n".join(blocks)
+        return content, orig_tokens, count_tokens(content, model=self.target_model, counter=self.token_counter)
+
+    def _source_tokens(self, file_path: str, source: Optional[str], context=None) -> int:
+        """Token count of the whole file, remembered in the index manifest."""
+        key = self._token_key()
+        tokens = self.index.entry(file_path)["tokens"].get(key)
+        if tokens is None:
+            if source is None:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    source = f.read()
+            # Reuse the caller's cached count when the context is this file
+            text = context if context == source else source
+            tokens = count_tokens(text, model=self.target_model, counter=self.token_counter)
+            self.index.record_tokens(file_path, key, tokens)
+        return tokens
 
     def optimize(
         self,
         context: Union[str, List[str]],
         query: Optional[str] = None,
-        file_path: Optional[str] = None,
+        file_path: Optional[Union[str, List[str]]] = None,
         max_tokens: Optional[int] = None,
         **kwargs
     ) -> OptimizedContext:
         """
         Embeds the code in `file_path` and returns the segments most relevant to `query`.
+
+        ``file_path`` may be a single file, a directory (searched recursively
+        for ``.py`` files), a glob pattern or a list of these. Units from all
+        files compete in one global top-k search, and each result's file and
+        line range is reported in ``OptimizedContext.sources``.
+        """
+        return self.optimize_many([query], file_path=file_path, context=context, max_tokens=max_tokens)[0]
+
+    def optimize_many(
+        self,
+        queries: List[Optional[str]],
+        file_path: Optional[Union[str, List[str]]] = None,
+        context: Union[str, List[str]] = "",
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> List[OptimizedContext]:
+        """
+        Answer several queries against the same code in one pass.
+
+        Files are synced and units embedded once, all queries are encoded in
+        a single batch and searched with one matrix search. Returns one
+        ``OptimizedContext`` per query, in order; each reports the batch's
+        wall time divided evenly across the queries as its latency.
+
+        Parameters
+        ----------
+        queries : List[str]
+            Queries to answer. Empty entries use a generic default query.
+        file_path : str or List[str]
+            File, directory, glob pattern or list of these, as for ``optimize``.
+        context : str, optional
+            Returned unchanged (as a fallback) when ``file_path`` is missing.
+        max_tokens : int, optional
+            Maximum token budget for each optimized context. Units are
+            packed greedily by relevance, skipping those that do not fit.
         """
         start_time = time.time()
 
         if not file_path:
             logger.warning("SemanticOptimizer requires 'file_path'. Returning original.")
-            orig_tokens = count_tokens(str(context), model=self.target_model)
-            return self._create_fallback_context(str(context), orig_tokens, start_time, "missing_filepath")
+            text = context if isinstance(context, str) else str(context)
+            orig_tokens = count_tokens(text, model=self.target_model, counter=self.token_counter)
+            return [self._create_fallback_context(text, orig_tokens, start_time, "missing_filepath") for _ in queries]
+
+        # A path that is neither a directory nor a pattern names one file
+        # explicitly, so it must exist and parse
+        single_file = isinstance(file_path, str) and not os.path.isdir(file_path) and not glob.has_magic(file_path)
+        paths = self._resolve_paths(file_path)
+        if not paths:
+            raise OptimizerError(f"No Python files found for {file_path!r}")
 
         self._lazy_load_deps()
-        
-        # Extract Chunks
-        units = self._extract_semantic_units(file_path)
-        full_source = units[0]["code"] if units and units[0]["type"] == "file" else ""
-        orig_tokens = count_tokens(full_source, model=self.target_model)
 
         # whether model fails to load
         if self.model_load_failed:
-            return self._create_fallback_context(full_source, orig_tokens, start_time, "model_load_failed")
-        
-        if not units:
-             return self._create_fallback_context("", orig_tokens, start_time, "no_units")
-
-        # Embed Chunks
-        valid_units = [u for u in units if u.get("code") and u.get("type") != "file"]
-        
-        if not valid_units:
-             return self._create_fallback_context("", orig_tokens, start_time, "no_valid_chunks")
-
-        codes = [u["code"] for u in valid_units]
-        embeddings = self._model.encode(codes)
-
-        # Build Index
-        d = embeddings.shape[1]
-        index = self._faiss.IndexFlatL2(d)
-        index.add(self._numpy.array(embeddings, dtype=self._numpy.float32))
-
-        # Embed Query & Search
-        if not query:
-             query = "main logic"
-
-        query_emb = self._model.encode([query])
-        k_search = min(self.top_k, len(valid_units))
-        
-        distances, indices = index.search(
-            self._numpy.array(query_emb, dtype=self._numpy.float32), 
-            k=k_search
+            if single_file:
+                full_source = self._extract_semantic_units(paths[0])[0]["code"]
+                source = context if context == full_source else full_source
+                orig_tokens = opt_tokens = count_tokens(source, model=self.target_model, counter=self.token_counter)
+            else:
+                full_source, orig_tokens, opt_tokens = self._pass_through(paths, max_tokens)
+            return [
+                self._create_fallback_context(full_source, orig_tokens, start_time, "model_load_failed", opt_tokens)
+                for _ in queries
+            ]
+
+        # Index new or changed units; unchanged files are not even read
+        self._forget_deleted(file_path, paths)
+        entries, sources = self._sync_files(paths, strict=single_file)
+        orig_tokens = sum(
+            self._source_tokens(p, sources.get(p), context if single_file else None)
+            for p in entries
         )
 
+        ids = [i for entry in entries.values() for i in entry["ids"]]
+        if not ids:
+            self.index.save()
+            return [self._create_fallback_context("", orig_tokens, start_time, "no_valid_chunks") for _ in queries]
+
+        # Embed Queries & Search
+        query_emb = self._embed_queries([query or "main logic" for query in queries])
+        k_search = min(self.top_k * _CANDIDATES_PER_UNIT, len(ids))
+        # Searching every indexed unit needs no ID filter
+        all_hits = self.index.search(query_emb, k_search, ids=None if len(ids) == len(self.index) else ids)
+
+        latency = (time.time() - start_time) * 1000 / max(len(queries), 1)
+        results = [self._build_result(hits, orig_tokens, latency, single_file, max_tokens) for hits in all_hits]
+        self.index.save()
+        return results
+
+    def _build_result(self, hits, orig_tokens: int, latency: float, single_file: bool,
+                      max_tokens: Optional[int] = None) -> OptimizedContext:
         # Construct Result
-        results = []
-        for idx in indices[0]:
-            if idx != -1:
-                results.append(valid_units[idx]["code"])
+        units = [unit for _, unit in hits]
+        headers = ["" if single_file else f"# {_provenance(unit)}\n" for unit in units]
+        blocks = [header + unit["code"] for header, unit in zip(headers, units)]
+        costs = self._unit_tokens(units)
+        if not single_file:
+            costs = [c + count_tokens(h, model=self.target_model, counter=self.token_counter) for c, h in zip(costs, headers)]
+        separator_cost = count_tokens(_SEPARATOR, model=self.target_model, counter=self.token_counter)
+        chosen, dedup_saved = _pack(hits, costs, self.top_k, max_tokens, separator_cost)
+
+        while True:
+            final_content = _SEPARATOR.join(blocks[i] for i in chosen)
+            opt_tokens = count_tokens(final_content, model=self.target_model, counter=self.token_counter)
+            # Tokens can merge across block boundaries, so re-check the actual total
+            if max_tokens is None or opt_tokens <= max_tokens or not chosen:
+                break
+            chosen.pop()
 
-        final_content = "\n\n# ... [Semantic Context Search Result] ...\n\n".join(results)
-        
         # Metrics Calculation
-        opt_tokens = count_tokens(final_content, model=self.target_model)
-        latency = (time.time() - start_time) * 1000
         ratio = opt_tokens / orig_tokens if orig_tokens > 0 else 0.0
 
         return OptimizedContext(
@@ -166,25 +386,187 @@ class SemanticOptimizer(BaseOptimizer):
             metrics=OptimizerMetrics(
                 original_tokens=orig_tokens,
                 optimized_tokens=opt_tokens,
-                chunks_retrieved=len(results),     
+                chunks_retrieved=len(chosen),
                 compression_ratio=ratio,           
                 latency_ms=latency,                
                 retrieval_mode="semantic_search",  
-                ast_fidelity=1.0
-            )
+                ast_fidelity=1.0,
+                dedup_tokens_saved=dedup_saved
+            ),
+            sources=[_source_info(hits[i][1], hits[i][0]) for i in chosen]
         )
 
-    def _create_fallback_context(self, content, tokens, start_time, reason):
+    def _token_key(self) -> str:
+        """Key token counts are stored under: target model and counting mode."""
+        return f"{self.target_model}|{self.token_counter or get_token_counter()}"
+
+    def _count_codes(self, codes: List[str]) -> List[int]:
+        return [count_tokens(code, model=self.target_model, counter=self.token_counter) for code in codes]
+
+    def _unit_tokens(self, units: List[Dict[str, Any]]) -> List[int]:
+        """
+        Token counts of the units' code. Units are counted when indexed;
+        only those indexed under another model or counting mode are counted
+        here.
+        """
+        key = self._token_key()
+        missing = [unit for unit in units if key not in unit.get("tokens", {})]
+        if missing:
+            self.index.record_unit_tokens(missing, key, self._count_codes([unit["code"] for unit in missing]))
+        return [unit["tokens"][key] for unit in units]
+
+    def _embed_units(self, codes: List[str]):
+        """Embeddings for ``codes``, encoding only content not already cached."""
+        np = self._numpy
+        keys = [embedding_key(code) for code in codes]
+        found = self.embedding_cache.get_many(keys)
+        missing = {k: code for k, code in zip(keys, codes) if k not in found}
+        if missing:
+            encoded = np.asarray(self._model.encode(list(missing.values())), dtype=np.float32)
+            self.embedding_cache.put_many(list(missing), encoded)
+            found.update(zip(missing, encoded))
+        return np.stack([found[k] for k in keys]).astype(np.float32, copy=False)
+
+    def _embed_queries(self, queries: List[str]):
+        """Query embeddings (one row per query), encoding only those not in the LRU in one batch."""
+        np = self._numpy
+        found = {}
+        for query in queries:
+            cached = self._query_cache.get(query)
+            if cached is not None:
+                self._query_cache.move_to_end(query)
+                found[query] = cached
+        missing = [q for q in dict.fromkeys(queries) if q not in found]
+        if missing:
+            encoded = np.asarray(self._model.encode(missing), dtype=np.float32)
+            for query, embedding in zip(missing, encoded):
+                found[query] = embedding
+                if self.query_cache_size > 0:
+                    self._query_cache[query] = embedding
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return np.stack([found[q] for q in queries])
+
+    def _create_fallback_context(self, content, tokens, start_time, reason, optimized_tokens=None):
         """Helper to create consistent fallback response."""
+        optimized_tokens = tokens if optimized_tokens is None else optimized_tokens
         return OptimizedContext(
             content=content,
             metrics=OptimizerMetrics(
                 original_tokens=tokens,
-                optimized_tokens=tokens,
+                optimized_tokens=optimized_tokens,
                 chunks_retrieved=0,
-                compression_ratio=1.0,
+                compression_ratio=optimized_tokens / tokens if tokens else 1.0,
                 latency_ms=(time.time() - start_time) * 1000,
                 retrieval_mode=f"fallback_{reason}",
                 ast_fidelity=1.0
             )
         )
+
+
+def _parse_source(source: str, file_path: str) -> List[Dict[str, Any]]:
+    """The whole file plus every class and function in it, with line ranges."""
+    try:
+        tree = ast.parse(source)
+        file_name = os.path.basename(file_path)
+        units = []
+
+        # Add the full file context
+        units.append({
+            "type": "file",
+            "name": file_name,
+            "code": source,
+            "metadata": {"file_name": file_name, "file_path": file_path,
+                         "start_line": 1, "end_line": source.count("\n") + 1}
+        })
+
+        # Walk AST for Classes and Functions
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+                units.append({
+                    "type": "class" if isinstance(node, ast.ClassDef) else "function",
+                    "name": node.name,
+                    "code": ast.get_source_segment(source, node),
+                    "metadata": {"file_name": file_name, "file_path": file_path,
+                                 "start_line": node.lineno, "end_line": node.end_lineno}
+                })
+        return units
+    except Exception as e:
+        raise OptimizerError(f"Failed to parse AST for {file_path}: {e}")
+
+def _search_roots(file_path: Union[str, List[str]]) -> List[str]:
+    """Directories searched by the directory and glob entries of ``file_path``."""
+    if isinstance(file_path, (list, tuple)):
+        return [root for item in file_path for root in _search_roots(item)]
+    if os.path.isdir(file_path):
+        return [os.path.abspath(file_path)]
+    if glob.has_magic(file_path):
+        root = file_path
+        while glob.has_magic(root):
+            root = os.path.dirname(root)
+        return [os.path.abspath(root or os.curdir)]
+    return []
+
+
+def _parse_file(path: str):
+    """Process-pool worker: (path, stat, source, units, error)."""
+    try:
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            source = f.read().decode("utf-8")
+        return path, stat, source, _parse_source(source, path), None
+    except OptimizerError as e:
+        return path, None, None, None, str(e)
+    except Exception as e:
+        return path, None, None, None, f"Failed to parse AST for {path}: {e}"
+
+def _contains(outer: Dict[str, Any], inner: Dict[str, Any]) -> bool:
+    """True if ``inner``'s lines lie within ``outer``'s in the same file."""
+    a, b = outer.get("metadata", {}), inner.get("metadata", {})
+    if a.get("start_line") is None or b.get("start_line") is None:
+        return False
+    return (a.get("file_path", a.get("file_name")) == b.get("file_path", b.get("file_name"))
+            and a["start_line"] <= b["start_line"] and b["end_line"] <= a["end_line"])
+
+def _pack(hits, costs: List[int], limit: int, budget: Optional[int] = None, separator_cost: int = 0):
+    """
+    Greedily pick up to ``limit`` hits, best first, within ``budget`` tokens.
+
+    A hit nested in an already picked unit is skipped, since its code is
+    already included. A hit containing already picked units is skipped as
+    well: those better-ranked children are a cheaper subset of it. Hits that
+    no longer fit the budget are skipped so smaller ones can fill the rest.
+
+    Returns the picked positions and the tokens the overlap checks saved.
+    """
+    chosen: List[int] = []
+    used = saved = 0
+    for i, (_, unit) in enumerate(hits):
+        if len(chosen) >= limit:
+            break
+        parents = [j for j in chosen if _contains(hits[j][1], unit)]
+        children = [j for j in chosen if _contains(unit, hits[j][1])]
+        if parents or children:
+            saved += costs[i] if parents else sum(costs[j] for j in children)
+            continue
+        cost = costs[i] + (separator_cost if chosen else 0)
+        if budget is not None and used + cost > budget:
+            continue
+        chosen.append(i)
+        used += cost
+    return chosen, saved
+
+def _provenance(unit: Dict[str, Any]) -> str:
+    meta = unit.get("metadata", {})
+    return f"{meta.get('file_path', meta.get('file_name'))}:{meta.get('start_line')}-{meta.get('end_line')}"
+
+def _source_info(unit: Dict[str, Any], score: float) -> Dict[str, Any]:
+    meta = unit.get("metadata", {})
+    return {
+        "type": unit.get("type"),
+        "name": unit.get("name"),
+        "file_path": meta.get("file_path"),
+        "start_line": meta.get("start_line"),
+        "end_line": meta.get("end_line"),
+        "distance": score,
+    }
@@ -0,0 +1,343 @@
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .embedding_cache import embedding_key
+from .index_backends import BACKENDS, EXACT_MAX_UNITS, exact_search, make_backend, select_backend
+
+_MANIFEST = "manifest.json"
+_IDS = "ids.npy"
+_VECTORS = "vectors.npy"
+_BACKEND = "backend.faiss"
+_LEGACY_INDEX = "index.faiss"
+
+
+class CodeIndex:
+    """
+    Incrementally updated vector index over code units from many files.
+
+    Vectors are labelled with unit IDs so units can be added, removed or
+    replaced individually. A manifest records each file's mtime, size,
+    content hash and unit IDs: unchanged files are skipped without being
+    read, and an edited file only re-adds the units whose code actually
+    changed.
+
+    Search runs on a pluggable backend (see ``index_backends``) chosen from
+    the corpus size and ``recall_target``: exact NumPy search for small
+    corpora, HNSW for large ones and IVF-PQ for very large ones. Searches
+    restricted to a small set of IDs (e.g. one file) always run exactly.
+
+    Parameters
+    ----------
+    path : str, optional
+        Directory to persist the index and manifest in. Loaded on first use
+        if present; ``None`` keeps the index in memory.
+    backend : str, default='auto'
+        ``'auto'``, ``'exact'``, ``'hnsw'`` or ``'ivfpq'``.
+    recall_target : float, default=0.95
+        Minimum recall@k the automatic backend choice must deliver.
+    """
+
+    def __init__(self, path: Optional[str] = None, backend: str = "auto", recall_target: float = 0.95):
+        if backend != "auto" and backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS} or 'auto'.")
+        self.path = path
+        self.backend = backend
+        self.recall_target = recall_target
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+        self._backend = None
+        self._backend_dirty = False
+        # Row buffers grow by doubling; rows past ``_size`` are unused
+        self._id_buffer = None
+        self._vector_buffer = None
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._dim: Optional[int] = None
+        self._next_id = 0
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._units: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def _ids(self):
+        return None if self._id_buffer is None else self._id_buffer[:self._size]
+
+    @property
+    def _vectors(self):
+        return None if self._vector_buffer is None else self._vector_buffer[:self._size]
+
+    def entry(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry for ``file_path`` if it is indexed."""
+        with self._lock:
+            self._load()
+            return self._files.get(os.path.abspath(file_path))
+
+    def files(self) -> List[str]:
+        """Paths of all indexed files."""
+        with self._lock:
+            self._load()
+            return list(self._files)
+
+    def is_current(self, file_path: str, stat: os.stat_result) -> bool:
+        """True if ``file_path`` is indexed and unchanged since (by mtime and size)."""
+        entry = self.entry(file_path)
+        return entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+
+    def update_file(self, file_path: str, stat: os.stat_result, digest: str,
+                    units: Sequence[Dict[str, Any]], embed: Callable[[List[str]], Any],
+                    count: Optional[Callable[[List[str]], List[int]]] = None,
+                    token_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Bring ``file_path`` up to date with its freshly parsed ``units``.
+
+        Units identical to ones already indexed for the file keep their IDs,
+        vectors and token counts; only new or changed units are passed to
+        ``embed``. If ``count`` is given, units without a token count under
+        ``token_key`` are counted with it, so the counts are saved with them.
+        """
+        with self._lock:
+            self._load()
+            key = os.path.abspath(file_path)
+            entry = self._files.get(key)
+            if entry is not None and entry["hash"] == digest:
+                entry.update(mtime=stat.st_mtime_ns, size=stat.st_size)
+                self._dirty = True
+                return entry
+
+            reusable: Dict[Tuple, List[int]] = {}
+            for unit_id in (entry or {}).get("ids", []):
+                reusable.setdefault(_unit_key(self._units[unit_id]), []).append(unit_id)
+
+            ids: List[int] = []
+            added: List[Tuple[int, Dict[str, Any]]] = []
+            for unit in units:
+                matches = reusable.get(_unit_key(unit))
+                if matches:
+                    unit_id = matches.pop()
+                    unit["tokens"] = self._units[unit_id].get("tokens", {})
+                else:
+                    unit_id = self._next_id
+                    self._next_id += 1
+                    added.append((unit_id, unit))
+                self._units[unit_id] = unit
+                ids.append(unit_id)
+
+            if count is not None:
+                uncounted = [unit for unit in units if token_key not in unit.get("tokens", {})]
+                self._set_unit_tokens(uncounted, token_key, count([unit["code"] for unit in uncounted]))
+
+            stale = [i for remaining in reusable.values() for i in remaining]
+            self._remove_ids(stale)
+            if added:
+                self._add([i for i, _ in added], embed([u["code"] for _, u in added]))
+
+            entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": digest, "ids": ids, "tokens": {}}
+            self._files[key] = entry
+            self._dirty = True
+            return entry
+
+    def record_tokens(self, file_path: str, key: str, tokens: int) -> None:
+        """Remember the token count of an indexed file under ``key`` (model and counting mode)."""
+        with self._lock:
+            self.entry(file_path)["tokens"][key] = tokens
+            self._dirty = True
+
+    def record_unit_tokens(self, units: Sequence[Dict[str, Any]], key: str, tokens: Sequence[int]) -> None:
+        """
+        Remember the token counts of indexed ``units`` under ``key`` (model and counting mode).
+
+        The counts are kept in memory and written with the next change to
+        the index, rather than forcing a rewrite of the whole index.
+        """
+        with self._lock:
+            self._set_unit_tokens(units, key, tokens)
+
+    def remove_file(self, file_path: str) -> None:
+        """Drop a file and its vectors from the index."""
+        with self._lock:
+            self._load()
+            entry = self._files.pop(os.path.abspath(file_path), None)
+            if entry is not None:
+                self._remove_ids(entry["ids"])
+                self._dirty = True
+
+    def search(self, queries, k: int, ids: Optional[Sequence[int]] = None) -> List[List[Tuple[float, Dict[str, Any]]]]:
+        """
+        Nearest units for each query vector, optionally restricted to ``ids``.
+
+        Returns one list of ``(distance, unit)`` pairs per query, best first.
+        """
+        import numpy as np
+
+        queries = np.asarray(queries, dtype=np.float32)
+        with self._lock:
+            self._load()
+            if self._ids is None or len(self._ids) == 0 or k < 1:
+                return [[] for _ in range(len(queries))]
+            if ids is not None and len(ids) <= EXACT_MAX_UNITS:
+                rows = np.fromiter((self._rows[i] for i in ids), dtype=np.int64, count=len(ids))
+                distances, labels = exact_search(queries, self._ids[rows], self._vectors[rows], k)
+            else:
+                distances, labels = self._get_backend().search(queries, k, ids=ids)
+            return [
+                [(float(d), self._units[int(i)]) for d, i in zip(row_d, row_i) if i != -1]
+                for row_d, row_i in zip(distances, labels)
+            ]
+
+    @property
+    def backend_name(self) -> str:
+        """Backend the next unrestricted search will use."""
+        with self._lock:
+            self._load()
+            if self.backend != "auto":
+                return self.backend
+            return select_backend(len(self._rows), self.recall_target)
+
+    def save(self) -> None:
+        """Write the vectors, backend and manifest to ``path`` if anything changed."""
+        if self.path is None:
+            return
+        import numpy as np
+
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            if self._ids is not None:
+                for name, array in ((_IDS, self._ids), (_VECTORS, self._vectors)):
+                    tmp = os.path.join(self.path, name + ".tmp")
+                    with open(tmp, "wb") as f:
+                        np.save(f, array)
+                    os.replace(tmp, os.path.join(self.path, name))
+            backend_file = os.path.join(self.path, _BACKEND)
+            saved_backend, deleted = None, []
+            if self._backend is not None and not self._backend_dirty and hasattr(self._backend, "index"):
+                import faiss
+                faiss.write_index(self._backend.index, backend_file + ".tmp")
+                os.replace(backend_file + ".tmp", backend_file)
+                saved_backend = self._backend.name
+                deleted = sorted(self._backend.deleted)
+            elif os.path.exists(backend_file):
+                os.remove(backend_file)
+            manifest = {
+                "dim": self._dim,
+                "next_id": self._next_id,
+                "backend": saved_backend,
+                "backend_deleted": deleted,
+                "files": self._files,
+                "units": {str(i): u for i, u in self._units.items()},
+            }
+            tmp = os.path.join(self.path, _MANIFEST + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp, os.path.join(self.path, _MANIFEST))
+            self._dirty = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._units)
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None or not os.path.exists(os.path.join(self.path, _MANIFEST)):
+            return
+        import numpy as np
+
+        with open(os.path.join(self.path, _MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._dim = manifest["dim"]
+        self._next_id = manifest["next_id"]
+        self._files = manifest["files"]
+        self._units = {int(i): u for i, u in manifest["units"].items()}
+        if os.path.exists(os.path.join(self.path, _IDS)):
+            self._id_buffer = np.load(os.path.join(self.path, _IDS))
+            self._vector_buffer = np.load(os.path.join(self.path, _VECTORS))
+        elif os.path.exists(os.path.join(self.path, _LEGACY_INDEX)):
+            # Indexes written before pluggable backends kept vectors in a faiss IndexIDMap2
+            import faiss
+            legacy = faiss.read_index(os.path.join(self.path, _LEGACY_INDEX))
+            self._id_buffer = faiss.vector_to_array(legacy.id_map).astype(np.int64)
+            self._vector_buffer = legacy.index.reconstruct_n(0, legacy.ntotal)
+        if self._id_buffer is not None:
+            self._size = len(self._id_buffer)
+            self._rows = {int(i): row for row, i in enumerate(self._id_buffer)}
+
+        saved = manifest.get("backend")
+        if saved and saved == self.backend_name and os.path.exists(os.path.join(self.path, _BACKEND)):
+            import faiss
+            self._backend = make_backend(saved, self.recall_target)
+            self._backend.index = faiss.read_index(os.path.join(self.path, _BACKEND))
+            self._backend.deleted = set(manifest.get("backend_deleted", []))
+
+    def _get_backend(self):
+        name = self.backend_name
+        if self._backend is None or self._backend_dirty or self._backend.name != name:
+            self._backend = make_backend(name, self.recall_target)
+            self._backend.build(self._ids, self._vectors)
+            self._backend_dirty = False
+            self._dirty = True
+        return self._backend
+
+    def _add(self, ids: List[int], vectors) -> None:
+        import numpy as np
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ids_array = np.asarray(ids, dtype=np.int64)
+        end = self._size + len(ids_array)
+        if self._id_buffer is None:
+            self._dim = vectors.shape[1]
+            self._id_buffer = np.empty(0, dtype=np.int64)
+            self._vector_buffer = np.empty((0, self._dim), dtype=np.float32)
+        if end > len(self._id_buffer):
+            # Doubling keeps appends amortised O(1) per row
+            capacity = max(end, 2 * len(self._id_buffer))
+            id_buffer = np.empty(capacity, dtype=np.int64)
+            vector_buffer = np.empty((capacity, self._dim), dtype=np.float32)
+            id_buffer[:self._size] = self._ids
+            vector_buffer[:self._size] = self._vectors
+            self._id_buffer, self._vector_buffer = id_buffer, vector_buffer
+        self._id_buffer[self._size:end] = ids_array
+        self._vector_buffer[self._size:end] = vectors
+        self._rows.update((int(i), self._size + n) for n, i in enumerate(ids))
+        self._size = end
+        self._patch_backend("add", ids_array, vectors)
+
+    @staticmethod
+    def _set_unit_tokens(units: Sequence[Dict[str, Any]], key: str, tokens: Sequence[int]) -> None:
+        for unit, count in zip(units, tokens):
+            unit.setdefault("tokens", {})[key] = count
+
+    def _remove_ids(self, ids: List[int]) -> None:
+        if not ids:
+            return
+        import numpy as np
+
+        # Fill each freed row with the last row, so removal only touches the rows involved
+        for unit_id in ids:
+            row = self._rows.pop(int(unit_id), None)
+            if row is None:
+                continue
+            last = self._size - 1
+            if row != last:
+                moved = int(self._id_buffer[last])
+                self._id_buffer[row] = moved
+                self._vector_buffer[row] = self._vector_buffer[last]
+                self._rows[moved] = row
+            self._size = last
+        self._patch_backend("remove", np.asarray(ids, dtype=np.int64))
+        for unit_id in ids:
+            self._units.pop(unit_id, None)
+
+    def _patch_backend(self, method: str, *args) -> None:
+        """Apply an add or remove to the backend, or mark it for a rebuild."""
+        if self._backend is not None and not self._backend_dirty:
+            self._backend_dirty = not self._backend.incremental or not getattr(self._backend, method)(*args)
+
+
+def _unit_key(unit: Dict[str, Any]) -> Tuple:
+    return (unit.get("type"), unit.get("name"), embedding_key(unit.get("code") or ""))
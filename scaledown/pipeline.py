@@ -2,7 +2,7 @@ from typing import List, Tuple, Union, Optional
 from scaledown.optimizer.base import BaseOptimizer
 from scaledown.compressor.base import BaseCompressor
 from scaledown.types import OptimizedContext, CompressedPrompt
-from scaledown.types import PipelineResult, StepMetadata
+from scaledown.types import PipelineResult, StepMetadata, TokenizedText
 from scaledown.types.metrics import count_tokens
 
 class Pipeline:
@@ -23,7 +23,8 @@ class Pipeline:
     >>> result = pipe.run(context=code, query="Add type hints", prompt="Explain changes")
     """
     
-    def __init__(self, steps: List[Tuple[str, Union[BaseOptimizer, BaseCompressor]]]):
+    def __init__(self, steps: List[Tuple[str, Union[BaseOptimizer, BaseCompressor]]],
+                 token_counter: Optional[str] = None):
         """
         Initialize pipeline with ordered steps.
         
@@ -31,8 +32,12 @@ class Pipeline:
         ----------
         steps : List[Tuple[str, Union[BaseOptimizer, BaseCompressor]]]
             List of (name, transformer) tuples
+        token_counter : {'exact', 'approx'}, optional
+            Token counting mode for custom callable steps. Optimizers and
+            compressors take their own ``token_counter``.
         """
         self.steps = steps
+        self.token_counter = token_counter
         self._validate_steps()
     
     def _validate_steps(self):
@@ -51,7 +56,9 @@ class Pipeline:
                     "Pipeline order must be: optimizers -> compressors"
                 )
     def run(self, context: str, **kwargs) -> PipelineResult:
-        current_context = context
+        # Text moves between steps as TokenizedText, so counts a step already
+        # reported are reused and nothing is tokenised twice
+        current_context = TokenizedText.of(context)
         original_context = context
         history: List[StepMetadata] = []
 
@@ -69,7 +76,7 @@ class Pipeline:
                 inp = getattr(result.metrics, 'original_tokens', 0)
                 out = getattr(result.metrics, 'optimized_tokens', 0)
                 lat = getattr(result.metrics, 'latency_ms', 0.0)
-                current_context = result.content
+                current_context = _carry(result.content, out, component)
             
             # COMPRESSOR
             elif isinstance(component, BaseCompressor):
@@ -81,13 +88,13 @@ class Pipeline:
                 inp = result.tokens[0]
                 out = result.tokens[1]
                 lat = result.latency
-                current_context = result.content
+                current_context = _carry(result.content, out, component)
             
             # UNKNOWN
             else:
-                output = component(current_context, **kwargs)
-                inp = count_tokens(current_context)
-                out = count_tokens(output)
+                output = TokenizedText.of(component(current_context, **kwargs))
+                inp = count_tokens(current_context, counter=self.token_counter)
+                out = count_tokens(output, counter=self.token_counter)
                 current_context = output
             
             history.append(StepMetadata(
@@ -116,6 +123,15 @@ class Pipeline:
         return f"Pipeline(steps={step_names})"
 
 
+def _carry(content: str, tokens: int, component) -> TokenizedText:
+    """Wrap a step's output, seeding the count the step already computed."""
+    text = TokenizedText.of(content)
+    model = getattr(component, "target_model", None)
+    if model is not None and tokens:
+        text.with_count(tokens, model=model, counter=getattr(component, "token_counter", None))
+    return text
+
+
 def make_pipeline(steps) -> Pipeline:
     """
     Helper function to create a pipeline.
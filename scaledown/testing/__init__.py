@@ -0,0 +1,3 @@
+from .mock_server import MockScaleDownServer
+
+__all__ = ["MockScaleDownServer"]
@@ -0,0 +1,65 @@
+"""
+Recall-vs-latency benchmark for the SemanticOptimizer index backends.
+
+Measures build time, per-query latency and recall@k against exact search
+on random vectors, which is what the thresholds in
+``scaledown.optimizer.index_backends`` are based on::
+
+    python -m scaledown.testing.index_benchmark --sizes 1000 20000 100000 --dim 384
+"""
+import argparse
+import time
+from typing import Dict, List, Sequence
+
+from ..optimizer.index_backends import BACKENDS, exact_search, make_backend
+
+
+def benchmark(sizes: Sequence[int] = (1_000, 10_000, 50_000), dim: int = 384, n_queries: int = 100,
+              k: int = 10, backends: Sequence[str] = BACKENDS, seed: int = 0) -> List[Dict[str, float]]:
+    """
+    Run every backend on clustered random data of each size.
+
+    Returns one row per (backend, size) with ``build_ms``, ``query_ms``
+    (mean per query, batched) and ``recall`` (recall@k against exact search).
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    rows = []
+    for n in sizes:
+        # Clustered data is closer to real embeddings than uniform noise
+        centers = rng.normal(size=(max(n // 100, 1), dim)).astype(np.float32)
+        vectors = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+        ids = np.arange(n, dtype=np.int64)
+        queries = vectors[rng.integers(0, n, n_queries)] + 0.1 * rng.normal(size=(n_queries, dim)).astype(np.float32)
+        _, truth = exact_search(queries, ids, vectors, k)
+
+        for name in backends:
+            backend = make_backend(name)
+            start = time.perf_counter()
+            backend.build(ids, vectors)
+            build_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            _, found = backend.search(queries, k)
+            query_ms = (time.perf_counter() - start) * 1000 / n_queries
+            recall = float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+            rows.append({"backend": name, "n": n, "build_ms": build_ms, "query_ms": query_ms, "recall": recall})
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SemanticOptimizer index backends.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<8} {'units':>9} {'build ms':>10} {'query ms':>10} {'recall@' + str(args.k):>10}")
+    for row in benchmark(args.sizes, args.dim, args.queries, args.k, args.backends):
+        print(f"{row['backend']:<8} {row['n']:>9} {row['build_ms']:>10.1f} {row['query_ms']:>10.3f} {row['recall']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Local stand-in for the hosted ScaleDown API.
+
+Speaks the same request/response schema as ``/compress/raw`` so client
+features (concurrency, pooling, caching, wire format) can be load-tested
+without network access.
+
+Run standalone with::
+
+    python -m scaledown.testing --port 8787 --latency-ms 80 --error-rate 0.01
+"""
+import argparse
+import gzip
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+_LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+_DECODERS = {"gzip": gzip.decompress, "deflate": zlib.decompress}
+
+
+class MockScaleDownServer:
+    """
+    Threaded HTTP server emulating the ScaleDown API.
+
+    Compression is simulated by keeping the leading fraction of words
+    (``rate``, or ``max_tokens`` words), and token counts are word counts.
+
+    Parameters
+    ----------
+    host : str, default='127.0.0.1'
+        Interface to bind.
+    port : int, default=0
+        Port to bind. ``0`` picks a free port; read it back from ``url``.
+    latency_ms : float, default=0.0
+        Mean added service latency per request.
+    latency_distribution : str, default='fixed'
+        One of ``'fixed'``, ``'uniform'`` (mean ± spread), ``'exponential'``
+        or ``'lognormal'`` (``spread`` is sigma of the underlying normal).
+    latency_spread : float, default=0.5
+        Relative spread for ``'uniform'`` and sigma for ``'lognormal'``.
+    error_rate : float, default=0.0
+        Fraction of requests answered with HTTP 500.
+    rate_limit_rate : float, default=0.0
+        Fraction of requests answered with HTTP 429.
+    max_rps : float, optional
+        Throughput cap. Requests over the cap receive 429 with ``Retry-After``.
+    max_concurrency : int, optional
+        Requests beyond this many in flight receive 429.
+    accept_encoding : str, optional, default='gzip, deflate'
+        Advertised request-body codings (RFC 7694). ``None`` advertises none
+        and rejects compressed bodies with 415.
+    seed : int, optional
+        Seed for latency and fault injection.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 latency_distribution: str = "fixed", latency_spread: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 max_rps: Optional[float] = None, max_concurrency: Optional[int] = None,
+                 accept_encoding: Optional[str] = "gzip, deflate", seed: Optional[int] = None):
+        if latency_distribution not in _LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {_LATENCY_DISTRIBUTIONS}.")
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_rps = max_rps
+        self.max_concurrency = max_concurrency
+        self.accept_encoding = accept_encoding
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._tokens = float(max_rps or 0)
+        self._refilled = time.monotonic()
+        self._counters: Dict[str, int] = {}
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as ``SCALEDOWN_API_URL``."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockScaleDownServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="scaledown-mock", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        """Request counters by outcome."""
+        with self._lock:
+            return dict(self._counters)
+
+    def __enter__(self) -> "MockScaleDownServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def _sample_latency(self) -> float:
+        mean = self.latency_ms
+        if mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency_distribution == "uniform":
+                return self._random.uniform(mean * (1 - self.latency_spread), mean * (1 + self.latency_spread))
+            if self.latency_distribution == "exponential":
+                return self._random.expovariate(1 / mean)
+            if self.latency_distribution == "lognormal":
+                sigma = self.latency_spread
+                # Choose mu so that the distribution mean equals latency_ms
+                return self._random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+            return mean
+
+    def _admit(self) -> Optional[int]:
+        """Return an injected HTTP status for this request, or None to serve it."""
+        with self._lock:
+            if self.max_rps:
+                now = time.monotonic()
+                self._tokens = min(self.max_rps, self._tokens + (now - self._refilled) * self.max_rps)
+                self._refilled = now
+                if self._tokens < 1:
+                    return 429
+                self._tokens -= 1
+            if self.max_concurrency is not None and self._inflight >= self.max_concurrency:
+                return 429
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                return 500
+            self._inflight += 1
+            return None
+
+    def _release(self) -> None:
+        with self._lock:
+            self._inflight -= 1
+
+    def compress(self, payload: Dict[str, Any], latency_ms: float) -> Dict[str, Any]:
+        """Build a ``/compress/raw`` response for ``payload``."""
+        words = str(payload.get("context", "")).split()
+        options = payload.get("scaledown") or {}
+        keep = len(words)
+        rate = options.get("rate", "auto")
+        if isinstance(rate, (int, float)):
+            keep = int(len(words) * rate)
+        elif rate == "auto":
+            keep = len(words) // 2
+        if options.get("max_tokens"):
+            keep = min(keep, int(options["max_tokens"]))
+        keep = max(keep, 1) if words else 0
+        compressed = " ".join(words[:keep])
+        return {
+            "results": {
+                "compressed_prompt": compressed,
+                "original_prompt_tokens": len(words),
+                "compressed_prompt_tokens": keep,
+            },
+            "total_original_tokens": len(words),
+            "total_compressed_tokens": keep,
+            "latency_ms": round(latency_ms, 3),
+            "model_used": payload.get("model", "mock"),
+            "request_metadata": {"timestamp": datetime.now(timezone.utc).isoformat()},
+        }
+
+
+def _make_handler(server: MockScaleDownServer):
+    routes = {"/compress/raw": server.compress}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            route = routes.get(self.path.rstrip("/"))
+            if route is None:
+                server._count("not_found")
+                return self._send(404, {"detail": "Not Found"})
+
+            coding = (self.headers.get("Content-Encoding") or "").lower()
+            if coding:
+                advertised = (server.accept_encoding or "").lower()
+                if coding not in _DECODERS or coding not in advertised:
+                    server._count("unsupported_encoding")
+                    return self._send(415, {"detail": f"Unsupported Content-Encoding: {coding}"})
+                body = _DECODERS[coding](body)
+
+            status = server._admit()
+            if status is not None:
+                server._count("rate_limited" if status == 429 else "errors")
+                return self._send(status, {"detail": "Injected failure"}, retry_after=status == 429)
+
+            try:
+                latency_ms = server._sample_latency()
+                time.sleep(latency_ms / 1000)
+                response = route(json.loads(body or b"{}"), latency_ms)
+            except ValueError:
+                server._count("bad_request")
+                return self._send(400, {"detail": "Invalid JSON"})
+            finally:
+                server._release()
+            server._count("ok")
+            self._send(200, response)
+
+        def _send(self, status: int, data: Dict[str, Any], retry_after: bool = False):
+            encoded = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            if server.accept_encoding:
+                self.send_header("Accept-Encoding", server.accept_encoding)
+            if retry_after:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run a local ScaleDown API stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-distribution", choices=_LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = MockScaleDownServer(
+        host=args.host, port=args.port, latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution, latency_spread=args.latency_spread,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        max_rps=args.max_rps, max_concurrency=args.max_concurrency, seed=args.seed
+    )
+    print(f"Mock ScaleDown API listening on {server.url} (set SCALEDOWN_API_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
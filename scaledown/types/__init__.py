@@ -2,6 +2,7 @@ from .metrics import OptimizerMetrics, CompressorMetrics
 from .optimized_prompt import OptimizedContext
 from .compressed_prompt import CompressedPrompt
 from .pipeline_result import PipelineResult, StepMetadata
+from .tokenized_text import TokenizedText
 
 __all__ = [
     "OptimizerMetrics",
@@ -9,5 +10,6 @@ __all__ = [
     "OptimizedContext",
     "CompressedPrompt",
     "PipelineResult",
-    "StepMetadata"
+    "StepMetadata",
+    "TokenizedText"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Tuple, Dict, Any
 
 @dataclass
@@ -8,6 +8,9 @@ class CompressedPrompt:
     tokens: Tuple[int, int]  # (original, compressed)
     latency: float
     model: str
+    cached: bool = False  # True when served from a compression cache
+    skipped: bool = False  # True when returned unchanged because compression could not pay off
+    details: Dict[str, Any] = field(default_factory=dict)
     
     @property
     def compression_ratio(self) -> float:
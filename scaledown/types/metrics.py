@@ -1,36 +1,176 @@
 from dataclasses import dataclass
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional
+import hashlib
 import logging
+import threading
 logger = logging.getLogger(__name__)
-try:
-    import tiktoken
+# tiktoken is imported on first use; importing it costs more than the rest of scaledown
+tiktoken = None
 
-except ImportError:
-    tiktoken = None
+from .token_estimator import get_estimator
+from .tokenized_text import TokenizedText
 
-def count_tokens(text: str, model: str = "gpt-4o") -> int:
+_TOKEN_COUNTERS = ("exact", "approx")
+_token_counter = "exact"
+
+# Optional bounded memo of (encoding, text hash) -> token count; disabled by default
+_memo: "OrderedDict[tuple, int]" = OrderedDict()
+_memo_maxsize = 0
+_memo_lock = threading.Lock()
+
+def _load_tiktoken():
+    global tiktoken
+    if tiktoken is None:
+        try:
+            import tiktoken as module
+        except ImportError:
+            return None
+        tiktoken = module
+    return tiktoken
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = "gpt-4o"):
     """
-    Count tokens using tiktoken. 
-    
-    If the provided model is not compatible with tiktoken (e.g., Claude, Llama),
-    it falls back to 'cl100k_base' (GPT-4) encoding to ensure a standard metric.
+    Return the tiktoken encoding for ``model``, resolved once per process.
+
+    Models unknown to tiktoken (e.g. Claude, Llama) map to 'cl100k_base'.
     """
-    if not text:
-        return 0
-        
-    if tiktoken is None:
+    if _load_tiktoken() is None:
         raise ImportError(
             "tiktoken is required for accurate metrics. "
             "Install it with: pip install tiktoken"
         )
-            
+
     try:
-        encoding = tiktoken.encoding_for_model(model)
+        return tiktoken.encoding_for_model(model)
     except KeyError:
         # Fallback for non-OpenAI models to a standard encoding
         logger.debug(f"Model '{model}' not found in tiktoken. Defaulting to cl100k_base.")
-        encoding = tiktoken.get_encoding("cl100k_base")
-        
-    return len(encoding.encode(text))
+        return tiktoken.get_encoding("cl100k_base")
+
+def set_token_counter(mode: str) -> None:
+    """
+    Select how token counts are produced process-wide.
+
+    ``'exact'`` tokenizes with tiktoken. ``'approx'`` uses a linear
+    estimator over character, word and symbol counts: several times faster.
+    The built-in estimators for ``cl100k_base`` and ``o200k_base`` publish
+    relative errors measured on a mixed code and prose corpus (95% of texts
+    within about 30%); ``calibrate`` fits tighter ones on your own texts
+    (see ``scaledown.types.token_estimator``). Components accepting a
+    ``token_counter`` argument override this per step.
+    """
+    global _token_counter
+    _token_counter = _resolve_counter(mode)
+
+def get_token_counter() -> str:
+    """Process-wide token counting mode."""
+    return _token_counter
+
+def _resolve_counter(mode: Optional[str]) -> str:
+    if mode is None:
+        return _token_counter
+    if mode not in _TOKEN_COUNTERS:
+        raise ValueError(f"token_counter must be one of {_TOKEN_COUNTERS}.")
+    return mode
+
+def set_token_memo(maxsize: int) -> None:
+    """
+    Enable a process-wide memo of recent token counts, keyed by text hash.
+
+    Useful when the same texts are counted repeatedly. ``0`` disables it.
+    """
+    global _memo_maxsize
+    if maxsize < 0:
+        raise ValueError("maxsize cannot be negative.")
+    with _memo_lock:
+        _memo_maxsize = maxsize
+        while len(_memo) > maxsize:
+            _memo.popitem(last=False)
+
+def _memo_key(encoding, text: str) -> tuple:
+    return (encoding.name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+
+def _memo_get(key):
+    with _memo_lock:
+        count = _memo.get(key)
+        if count is not None:
+            _memo.move_to_end(key)
+        return count
+
+def _memo_put(key, count: int) -> None:
+    with _memo_lock:
+        _memo[key] = count
+        while len(_memo) > _memo_maxsize:
+            _memo.popitem(last=False)
+
+def count_tokens(text: str, model: str = "gpt-4o", counter: Optional[str] = None) -> int:
+    """
+    Count tokens using tiktoken. 
+    
+    If the provided model is not compatible with tiktoken (e.g., Claude, Llama),
+    it falls back to 'cl100k_base' (GPT-4) encoding to ensure a standard metric.
+    ``counter`` overrides the process-wide mode set by ``set_token_counter``.
+    """
+    if not text:
+        return 0
+    mode = _resolve_counter(counter)
+    if isinstance(text, TokenizedText):
+        key = (model, mode)
+        count = text._token_counts.get(key)
+        if count is None:
+            count = text._token_counts[key] = count_tokens(str(text), model=model, counter=mode)
+        return count
+    if mode == "approx":
+        return get_estimator(model).estimate(text)
+
+    encoding = get_encoding(model)
+    if not _memo_maxsize:
+        return len(encoding.encode(text))
+
+    key = _memo_key(encoding, text)
+    count = _memo_get(key)
+    if count is None:
+        count = len(encoding.encode(text))
+        _memo_put(key, count)
+    return count
+
+def count_tokens_batch(texts: List[str], model: str = "gpt-4o", num_threads: int = 8,
+                       counter: Optional[str] = None) -> List[int]:
+    """
+    Count tokens for many texts at once using tiktoken's multi-threaded batch encoder.
+    """
+    if _resolve_counter(counter) == "approx":
+        estimator = get_estimator(model)
+        return [estimator.estimate(text) for text in texts]
+
+    counts = [0] * len(texts)
+    pending = [i for i, text in enumerate(texts) if text]
+    if not pending:
+        return counts
+
+    encoding = get_encoding(model)
+    keys = {}
+    if _memo_maxsize:
+        remaining = []
+        for i in pending:
+            keys[i] = _memo_key(encoding, texts[i])
+            count = _memo_get(keys[i])
+            if count is None:
+                remaining.append(i)
+            else:
+                counts[i] = count
+        pending = remaining
+
+    if pending:
+        encoded = encoding.encode_batch([texts[i] for i in pending], num_threads=num_threads)
+        for i, tokens in zip(pending, encoded):
+            counts[i] = len(tokens)
+            if keys:
+                _memo_put(keys[i], counts[i])
+    return counts
 
 @dataclass
 class OptimizerMetrics:
@@ -41,6 +181,8 @@ class OptimizerMetrics:
     latency_ms: float
     retrieval_mode: str
     ast_fidelity: float
+    # Tokens kept out of the result by dropping units that overlap selected ones
+    dedup_tokens_saved: int = 0
 
 @dataclass
 class CompressorMetrics:
@@ -1,10 +1,12 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
 from .metrics import OptimizerMetrics
 
 @dataclass
 class OptimizedContext:
     content: str
     metrics: OptimizerMetrics
+    sources: List[Dict[str, Any]] = field(default_factory=list)  # provenance of each retrieved unit
 
     @property
     def compression_ratio(self) -> float:
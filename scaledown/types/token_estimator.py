@@ -0,0 +1,169 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_WORD = re.compile(r"\w+")
+_SYMBOL = re.compile(r"[^\w\s]")
+
+def text_features(text: str) -> Tuple[float, float, float, float, float]:
+    """Character, word, symbol and non-ASCII byte counts plus a bias term."""
+    chars = len(text)
+    non_ascii = len(text.encode("utf-8", "surrogatepass")) - chars if not text.isascii() else 0
+    return (
+        float(chars),
+        float(len(_WORD.findall(text))),
+        float(len(_SYMBOL.findall(text))),
+        float(non_ascii),
+        1.0,
+    )
+
+@dataclass(frozen=True)
+class TokenEstimator:
+    """
+    Linear token-count estimator over cheap text statistics.
+
+    ``tokens ≈ c·chars + w·words + s·symbols + b·non_ascii_bytes + k``
+
+    Estimators returned by ``calibrate`` carry relative errors measured on
+    the calibration corpus: ``p95_error`` means 95% of texts were estimated
+    within that fraction of their exact count. Estimators built by hand
+    have no measured errors: they are ``None`` and ``samples`` is 0.
+    """
+    encoding: str
+    coefficients: Tuple[float, float, float, float, float]
+    mean_error: Optional[float] = None
+    p95_error: Optional[float] = None
+    max_error: Optional[float] = None
+    samples: int = 0
+
+    @property
+    def calibrated(self) -> bool:
+        """True if the error figures were measured with ``calibrate``."""
+        return self.samples > 0 and self.p95_error is not None
+
+    def estimate(self, text: str) -> int:
+        """Estimated token count for ``text``."""
+        if not text:
+            return 0
+        value = sum(c * f for c, f in zip(self.coefficients, text_features(text)))
+        return max(1, int(round(value)))
+
+    def bounds(self, text: str) -> Optional[Tuple[int, int]]:
+        """
+        Range expected to contain the exact count for ~95% of texts, or
+        ``None`` for an uncalibrated estimator.
+        """
+        if not self.calibrated:
+            return None
+        estimate = self.estimate(text)
+        return (
+            max(0, int(math.floor(estimate / (1 + self.p95_error)))),
+            int(math.ceil(estimate / max(1 - self.p95_error, 1e-6)))
+        )
+
+
+# Fitted with calibrate() on tests/data/token_corpus.jsonl: 228 texts of 80
+# to 3000 characters cut from this repository's Python, JavaScript, CSS and
+# Markdown, plus short prose in 16 languages. Errors are relative to the
+# exact count and rounded up; the largest are on short non-Latin texts.
+# Calibrate on a sample of your own corpus for tighter bounds.
+_DEFAULTS: Dict[str, TokenEstimator] = {
+    "cl100k_base": TokenEstimator(
+        encoding="cl100k_base", coefficients=(0.0658, 1.0149, 0.4258, 0.4174, 0.3604),
+        mean_error=0.0972, p95_error=0.28, max_error=0.4334, samples=228,
+    ),
+    "o200k_base": TokenEstimator(
+        encoding="o200k_base", coefficients=(0.0984, 0.719, 0.3995, 0.1296, 0.5801),
+        mean_error=0.1068, p95_error=0.2942, max_error=1.0, samples=228,
+    ),
+}
+_estimators: Dict[str, TokenEstimator] = dict(_DEFAULTS)
+
+def encoding_name_for_model(model: str) -> str:
+    """Name of the tiktoken encoding used for ``model`` without loading it."""
+    try:
+        from tiktoken.model import encoding_name_for_model as lookup
+        return lookup(model)
+    except (ImportError, KeyError):
+        return "cl100k_base"
+
+def get_estimator(model: str = "gpt-4o") -> TokenEstimator:
+    """Estimator registered for the encoding ``model`` uses."""
+    encoding = encoding_name_for_model(model)
+    return _estimators.get(encoding, _estimators["cl100k_base"])
+
+def register_estimator(estimator: TokenEstimator) -> None:
+    """Use ``estimator`` for every model sharing its encoding."""
+    _estimators[estimator.encoding] = estimator
+
+def calibrate(texts: Sequence[str], model: str = "gpt-4o", register: bool = True) -> TokenEstimator:
+    """
+    Fit an estimator against exact tiktoken counts on a sample corpus.
+
+    Solves a least-squares fit relative to each text's length, so short and
+    long texts contribute equally, and reports the observed error.
+
+    Parameters
+    ----------
+    texts : Sequence[str]
+        Representative sample; a few hundred texts is usually enough.
+    model : str, default='gpt-4o'
+        Model whose encoding is being approximated.
+    register : bool, default=True
+        Make the fitted estimator the default for that encoding.
+    """
+    from .metrics import count_tokens_batch
+
+    sample = [t for t in texts if t]
+    if len(sample) < 5:
+        raise ValueError("calibrate needs at least 5 non-empty texts.")
+    exact = count_tokens_batch(sample, model=model, counter="exact")
+    rows = [text_features(t) for t in sample]
+
+    # Weighted normal equations (X^T W X) c = X^T W y with w = 1 / y^2
+    n = len(rows[0])
+    xtx = [[0.0] * n for _ in range(n)]
+    xty = [0.0] * n
+    for row, y in zip(rows, exact):
+        weight = 1.0 / max(y, 1) ** 2
+        for i in range(n):
+            xty[i] += weight * row[i] * y
+            for j in range(n):
+                xtx[i][j] += weight * row[i] * row[j]
+    coefficients = _solve(xtx, xty)
+
+    provisional = TokenEstimator(encoding_name_for_model(model), tuple(coefficients))
+    errors = sorted(
+        abs(provisional.estimate(t) - y) / max(y, 1)
+        for t, y in zip(sample, exact)
+    )
+    estimator = TokenEstimator(
+        encoding=provisional.encoding,
+        coefficients=provisional.coefficients,
+        mean_error=sum(errors) / len(errors),
+        p95_error=errors[min(len(errors) - 1, int(0.95 * len(errors)))],
+        max_error=errors[-1],
+        samples=len(sample),
+    )
+    if register:
+        register_estimator(estimator)
+    return estimator
+
+def _solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """Gaussian elimination with partial pivoting and a small ridge term."""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for i in range(n):
+        m[i][i] += 1e-9
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        if abs(m[col][col]) < 1e-12:
+            continue
+        for r in range(n):
+            if r != col:
+                factor = m[r][col] / m[col][col]
+                for c in range(col, n + 1):
+                    m[r][c] -= factor * m[col][c]
+    return [m[i][n] / m[i][i] if abs(m[i][i]) >= 1e-12 else 0.0 for i in range(n)]
@@ -0,0 +1,40 @@
+from typing import Dict, Optional, Tuple
+
+class TokenizedText(str):
+    """
+    String that remembers its token counts.
+
+    Behaves exactly like ``str`` so it can be handed to any optimizer,
+    compressor or callable, but ``count_tokens`` answers from the cache
+    after the first call for a given model and counting mode. Strings are
+    immutable, so a cached count can never go stale; any derived string
+    (slices, concatenation) is a plain ``str`` again.
+
+    ``Pipeline`` passes text between steps in this form so each piece of
+    text is tokenised at most once per run.
+    """
+
+    def __new__(cls, text: str, token_counts: Optional[Dict[Tuple[str, str], int]] = None):
+        obj = super().__new__(cls, text)
+        obj._token_counts = dict(getattr(text, "_token_counts", {}))
+        obj._token_counts.update(token_counts or {})
+        return obj
+
+    @classmethod
+    def of(cls, text: str) -> "TokenizedText":
+        """Wrap ``text`` unless it already carries a token cache."""
+        return text if isinstance(text, cls) else cls(text)
+
+    def token_count(self, model: str = "gpt-4o", counter: Optional[str] = None) -> int:
+        """Token count for ``model``, computed on first use."""
+        from .metrics import count_tokens
+        return count_tokens(self, model=model, counter=counter)
+
+    def with_count(self, tokens: int, model: str = "gpt-4o", counter: Optional[str] = None) -> "TokenizedText":
+        """Record a count that is already known, e.g. from a step's metrics."""
+        from .metrics import _resolve_counter
+        self._token_counts[(model, _resolve_counter(counter))] = tokens
+        return self
+
+    def __reduce__(self):
+        return (TokenizedText, (str(self), self._token_counts))
@@ -0,0 +1,16 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+
+
+@pytest.fixture
+def api_response():
+    """Factory for mocked HTTP responses carrying a JSON body."""
+    def make(data, status_code=200, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.json.return_value = data
+        response.content = json.dumps(data).encode("utf-8")
+        return response
+    return make
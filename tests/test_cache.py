@@ -0,0 +1,54 @@
+import time
+import pytest
+from unittest.mock import patch
+import scaledown as sd
+from scaledown.compressor import MemoryCache, SQLiteCache, TieredCache
+
+
+def _prompt(content="compressed"):
+    return sd.CompressedPrompt(content=content, original_prompt="", tokens=(10, 5), latency=1.0, model="m")
+
+def test_memory_cache_lru_eviction():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", _prompt("a"))
+    cache.set("b", _prompt("b"))
+    assert cache.get("a").content == "a"   # 'a' is now most recent
+    cache.set("c", _prompt("c"))           # evicts 'b'
+
+    assert cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "hit_rate": 0.5}
+
+def test_memory_cache_ttl():
+    cache = MemoryCache(ttl=0.01)
+    cache.set("a", _prompt())
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+
+def test_tiered_cache_shares_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = TieredCache(disk=SQLiteCache(path))
+    writer.set("k", _prompt())
+
+    # A second worker with a cold memory tier reads from disk
+    reader = TieredCache(disk=SQLiteCache(path))
+    value = reader.get("k")
+    assert value.content == "compressed"
+    assert value.tokens == (10, 5)
+    assert reader.stats()["disk"]["hits"] == 1
+    assert reader.memory.get("k") is not None
+
+@patch('requests.Session.post')
+def test_compressor_uses_cache(mock_post, api_response):
+    mock_post.return_value = api_response({"results": {"compressed_prompt": "compressed"}})
+
+    comp = sd.ScaleDownCompressor(api_key="test_key", cache=MemoryCache())
+    first = comp.compress(context="ctx", prompt="p")
+    second = comp.compress(context="ctx", prompt="p")
+    other = comp.compress(context="ctx", prompt="p", max_tokens=10)
+
+    assert mock_post.call_count == 2
+    assert not first.cached
+    assert second.cached
+    assert second.content == first.content
+    assert not other.cached
@@ -1,7 +1,18 @@
 import pytest
 import os
-from unittest.mock import patch, MagicMock
+import gzip
+import json
+import math
+import random
+import asyncio
+import threading
+import time
+import requests
+from unittest.mock import patch, MagicMock, AsyncMock
 import scaledown as sd
+from scaledown.compressor import CoalescingCompressor, AIMDLimiter
+from scaledown.compressor.chunking import split_into_chunks
+from scaledown.testing import MockScaleDownServer
 
 @pytest.fixture
 def compressor():
@@ -17,11 +28,9 @@ def test_missing_api_key(monkeypatch):
     with pytest.raises(sd.AuthenticationError):
         comp.compress("context", "prompt")
 
-@patch('requests.post')
-def test_successful_compression(mock_post, compressor):
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
+@patch('requests.Session.post')
+def test_successful_compression(mock_post, compressor, api_response):
+    mock_post.return_value = api_response({
         "results": {
             "compressed_prompt": "compressed output",
             "original_prompt_tokens": 100,
@@ -29,8 +38,7 @@ def test_successful_compression(mock_post, compressor):
         },
         "latency_ms": 120,
         "model_used": "scaledown-v1"
-    }
-    mock_post.return_value = mock_response
+    })
 
     result = compressor.compress(context="long context", prompt="short prompt")
     
@@ -39,18 +47,15 @@ def test_successful_compression(mock_post, compressor):
     assert result.tokens == (100, 50)
     assert result.savings_percent == 50.0
 
-@patch('requests.post')
-def test_batch_compression(mock_post, compressor):
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
+@patch('requests.Session.post')
+def test_batch_compression(mock_post, compressor, api_response):
+    mock_post.return_value = api_response({
         "results": {
             "compressed_prompt": "compressed",
             "original_prompt_tokens": 10,
             "compressed_prompt_tokens": 5
         }
-    }
-    mock_post.return_value = mock_response
+    })
 
     contexts = ["ctx1", "ctx2"]
     prompts = ["p1", "p2"]
@@ -78,3 +83,331 @@ def test_live_api_call():
         assert len(result.content) > 0
     except Exception as e:
         pytest.fail(f"Live API call failed: {e}")
+
+def test_async_compression():
+    """AsyncScaleDownCompressor returns the same CompressedPrompt objects."""
+    pytest.importorskip("httpx")
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "results": {
+            "compressed_prompt": "compressed",
+            "original_prompt_tokens": 10,
+            "compressed_prompt_tokens": 5
+        }
+    }
+
+    async def run():
+        async with sd.AsyncScaleDownCompressor(api_key="test_key", max_concurrency=2) as comp:
+            with patch("httpx.AsyncClient.post", new=AsyncMock(return_value=mock_response)) as mock_post:
+                single = await comp.acompress(context="ctx", prompt="p")
+                batch = await comp.acompress(context=["c1", "c2", "c3"], prompt="p")
+            return single, batch, mock_post.await_count
+
+    single, batch, calls = asyncio.run(run())
+
+    assert isinstance(single, sd.CompressedPrompt)
+    assert single.tokens == (10, 5)
+    assert len(batch) == 3
+    assert all(r.content == "compressed" for r in batch)
+    assert calls == 4
+
+def test_async_compressor_sync_wrapper():
+    pytest.importorskip("httpx")
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"results": {"compressed_prompt": "out"}}
+    comp = sd.AsyncScaleDownCompressor(api_key="test_key")
+
+    with patch("httpx.AsyncClient.post", new=AsyncMock(return_value=mock_response)):
+        result = comp.compress(context="ctx", prompt="p")
+
+    assert result.content == "out"
+    # The per-call client is closed with the loop that owned it
+    assert comp._client is None
+
+def test_async_errors_match_sync():
+    """The async compressor reports HTTP status and bad bodies as APIError, like the sync one."""
+    httpx = pytest.importorskip("httpx")
+    request = httpx.Request("POST", "https://example.invalid/compress/raw")
+    rate_limited = httpx.Response(429, request=request, json={"detail": "Too many requests"})
+    not_json = httpx.Response(200, request=request, content=b"<html>bad gateway</html>")
+
+    async def run(response):
+        async with sd.AsyncScaleDownCompressor(api_key="test_key") as comp:
+            with patch("httpx.AsyncClient.post", new=AsyncMock(return_value=response)):
+                await comp.acompress(context="ctx", prompt="p")
+
+    with pytest.raises(sd.APIError) as exc_info:
+        asyncio.run(run(rate_limited))
+    assert exc_info.value.status_code == 429
+
+    with pytest.raises(sd.APIError, match="Invalid JSON") as exc_info:
+        asyncio.run(run(not_json))
+    assert exc_info.value.status_code is None
+
+@pytest.fixture
+def local_api(monkeypatch):
+    with MockScaleDownServer() as server:
+        monkeypatch.setenv("SCALEDOWN_API_URL", server.url)
+        yield server
+
+def test_connection_pool_reuse(local_api):
+    """Sequential calls reuse one keep-alive connection."""
+    with sd.ScaleDownCompressor(api_key="test_key") as comp:
+        for _ in range(3):
+            assert comp.compress(context="ctx", prompt="p").content == "ctx"
+        stats = comp.pool_stats()
+
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 2
+
+def test_closed_compressor_raises(local_api):
+    comp = sd.ScaleDownCompressor(api_key="test_key")
+    comp.close()
+    with pytest.raises(sd.APIError):
+        comp.compress(context="ctx", prompt="p")
+
+@patch('requests.Session.post')
+def test_coalescing_compressor(mock_post, compressor, api_response):
+    """Concurrent single requests are dispatched as one batch."""
+    mock_post.return_value = api_response({"results": {"compressed_prompt": "compressed"}})
+
+    with CoalescingCompressor(compressor, max_batch_size=4, max_wait_ms=200) as coalescer:
+        with patch.object(compressor, "compress", wraps=compressor.compress) as spy:
+            futures = [coalescer.submit(f"ctx{i}", "p") for i in range(4)]
+            results = [f.result(timeout=5) for f in futures]
+
+        assert spy.call_count == 1
+        assert len(spy.call_args.args[0]) == 4
+        assert coalescer.stats()["batches"] == 1
+
+    assert all(isinstance(r, sd.CompressedPrompt) for r in results)
+    assert mock_post.call_count == 4
+
+def test_coalescing_failure_affects_only_its_item(compressor):
+    """A failing item fails only its own caller; the rest are not re-sent."""
+    calls = []
+    def fake_single(context, prompt, **kwargs):
+        calls.append(context)
+        if context == "ctx3":
+            raise sd.APIError("rate limited", status_code=429)
+        return sd.CompressedPrompt(content=context, original_prompt=prompt, tokens=(2, 1), latency=1.0, model="m")
+
+    with patch.object(compressor, "_compress_single", side_effect=fake_single):
+        with CoalescingCompressor(compressor, max_batch_size=8, max_wait_ms=200) as coalescer:
+            futures = [coalescer.submit(f"ctx{i}", "p") for i in range(8)]
+            for i, future in enumerate(futures):
+                if i == 3:
+                    with pytest.raises(sd.APIError):
+                        future.result(timeout=5)
+                else:
+                    assert future.result(timeout=5).content == f"ctx{i}"
+
+    assert sorted(calls) == sorted(f"ctx{i}" for i in range(8))
+
+def test_aimd_limiter_adapts():
+    limiter = AIMDLimiter(initial_limit=4, min_limit=1, max_limit=8)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(latency_ms=10.0)
+    grown = limiter.limit
+    assert 4 < grown <= 8
+
+    limiter.acquire()
+    limiter.release(latency_ms=None, dropped=True)
+    assert limiter.limit == max(int(grown * 0.5), 1)
+    assert limiter.stats()["decreases"] == 1
+
+def test_aimd_limiter_tolerates_jitter_but_not_sustained_slowdown():
+    rng = random.Random(0)
+    limiter = AIMDLimiter(initial_limit=5, max_limit=64)
+    for _ in range(2000):
+        limiter.acquire()
+        limiter.release(latency_ms=rng.lognormvariate(math.log(50), 0.8))
+    assert limiter.stats()["decreases"] == 0
+    assert limiter.limit > 5
+
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release(latency_ms=rng.lognormvariate(math.log(500), 0.8))
+    assert limiter.stats()["decreases"] >= 1
+
+@patch('requests.Session.post')
+def test_rate_limited_request_backs_off(mock_post, api_response):
+    mock_response = api_response({"detail": "Too many requests"}, status_code=429)
+    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("429", response=mock_response)
+    mock_post.return_value = mock_response
+
+    comp = sd.ScaleDownCompressor(api_key="test_key", limiter=AIMDLimiter(initial_limit=8))
+    with pytest.raises(sd.APIError) as exc_info:
+        comp.compress(context="ctx", prompt="p")
+
+    assert exc_info.value.status_code == 429
+    stats = comp.stats()["concurrency"]
+    assert stats["limit"] == 4
+    assert stats["inflight"] == 0
+    assert stats["queue_depth"] == 0
+    comp.close()
+
+@patch('requests.Session.post')
+def test_compress_iter_streams_generator(mock_post, compressor, api_response):
+    def respond(url, headers=None, data=None, timeout=None):
+        payload = json.loads(data)
+        return api_response({"results": {"compressed_prompt": payload["context"].upper()}})
+    mock_post.side_effect = respond
+
+    contexts = (f"ctx{i}" for i in range(20))
+    results = list(compressor.compress_iter(contexts, "p", read_ahead=3))
+
+    assert sorted(i for i, _ in results) == list(range(20))
+    assert all(r.content == f"CTX{i}" for i, r in results)
+
+    ordered = list(compressor.compress_iter([f"c{i}" for i in range(10)], "p", ordered=True))
+    assert [i for i, _ in ordered] == list(range(10))
+    assert compressor.concurrency_stats()["queue_depth"] == 0
+
+@patch('requests.Session.post')
+def test_compress_iter_validates_arguments(mock_post, compressor, api_response):
+    mock_post.return_value = api_response({"results": {"compressed_prompt": "out"}})
+    # Raised by the call itself, before any result is requested
+    with pytest.raises(ValueError):
+        compressor.compress_iter("a single context", "p")
+    with pytest.raises(ValueError):
+        compressor.compress_iter(["ctx"], "p", read_ahead=0)
+
+    results = compressor.compress_iter(["c0", "c1", "c2"], iter(["p0", "p1"]))
+    with pytest.raises(ValueError):
+        list(results)
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Count one token per word so chunk boundaries are deterministic."""
+    def count(text, model="gpt-4o", counter=None):
+        return len(text.split())
+    monkeypatch.setattr("scaledown.compressor.chunking.count_tokens", count)
+    monkeypatch.setattr("scaledown.compressor.scaledown_compressor.count_tokens", count)
+
+def test_split_into_chunks_prefers_boundaries(word_tokens):
+    text = "One two three. Four five six.\n\nSeven eight.\n\n" + " ".join(["word"] * 12)
+    chunks = split_into_chunks(text, max_chunk_tokens=5)
+
+    # Sentences split an oversized paragraph; small neighbours are packed together
+    assert chunks[:2] == ["One two three.", "Four five six.\n\nSeven eight."]
+    assert all(len(c.split()) <= 5 for c in chunks)
+    assert sum(len(c.split()) for c in chunks) == len(text.split())
+
+@patch('requests.Session.post')
+def test_chunked_map_reduce(mock_post, word_tokens, api_response):
+    def respond(url, headers=None, data=None, timeout=None):
+        words = json.loads(data)["context"].split()
+        n = len(words)
+        return api_response({
+            "results": {"compressed_prompt": " ".join(words[: max(n // 2, 1)])},
+            "total_original_tokens": n,
+            "total_compressed_tokens": max(n // 2, 1),
+            "latency_ms": 10,
+        })
+    mock_post.side_effect = respond
+
+    comp = sd.ScaleDownCompressor(api_key="test_key", chunk_threshold=10)
+    context = "\n\n".join(" ".join(["w"] * 8) + "." for _ in range(4))
+    result = comp.compress(context=context, prompt="p", max_tokens=10)
+
+    # 4 map calls plus one reduce call to get under max_tokens
+    assert mock_post.call_count == 5
+    assert result.details["chunks"] == 4
+    assert result.details["reduce_pass"] is True
+    assert result.tokens[0] == 32
+    assert len(result.content.split()) <= 10
+    comp.close()
+
+@patch('requests.Session.post')
+def test_oversized_items_chunked_in_iter_and_batch(mock_post, word_tokens, api_response):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+    def respond(url, headers=None, data=None, timeout=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        words = json.loads(data)["context"].split()
+        return api_response({"results": {"compressed_prompt": " ".join(words[:2])}})
+    mock_post.side_effect = respond
+
+    comp = sd.ScaleDownCompressor(api_key="test_key", chunk_threshold=5, max_workers=8)
+    big = "\n\n".join(" ".join(["w"] * 4) + "." for _ in range(2))
+    results = dict(comp.compress_iter([big, "small ctx", big + " x."], "p"))
+    assert results[0].details["chunks"] == 2 and results[1].details.get("chunks") is None
+    assert results[2].details["chunks"] == 2
+
+    # Both oversized items' chunks are in flight together rather than one item after the other
+    peak[0] = 0
+    batch = comp.compress([big, big + " x."], "p")
+    assert [r.details["chunks"] for r in batch] == [2, 2]
+    assert peak[0] == 4
+    assert comp.concurrency_stats()["queue_depth"] == 0
+    comp.close()
+
+@patch('requests.Session.post')
+def test_request_body_compression_negotiated(mock_post, compressor, api_response):
+    """Bodies are gzipped only after the server advertises Accept-Encoding."""
+    mock_post.return_value = api_response(
+        {"results": {"compressed_prompt": "ok"}}, headers={"Accept-Encoding": "gzip, deflate"}
+    )
+    context = "patient history " * 500
+
+    first = compressor.compress(context=context, prompt="p")
+    second = compressor.compress(context=context, prompt="p")
+
+    assert "Content-Encoding" not in mock_post.call_args_list[0].kwargs["headers"]
+    assert mock_post.call_args_list[1].kwargs["headers"]["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(mock_post.call_args_list[1].kwargs["data"]))["context"] == context
+    assert first.details["bytes_sent"] == first.details["bytes_uncompressed"]
+    assert second.details["bytes_sent"] < second.details["bytes_uncompressed"] / 10
+    assert compressor.pool_stats()["bytes_sent"] == first.details["bytes_sent"] + second.details["bytes_sent"]
+
+@patch('requests.Session.post')
+def test_batch_deduplicates_identical_requests(mock_post, compressor, api_response):
+    mock_post.return_value = api_response({"results": {"compressed_prompt": "compressed"}})
+
+    results = compressor.compress(context=["same", "other", "same", "same"], prompt="p")
+
+    assert mock_post.call_count == 2
+    assert len(results) == 4
+    assert results[0] is not results[2]
+    assert results[2].details["deduplicated"] is True
+    assert compressor.stats()["batch"]["deduplicated_requests"] == 2
+
+@patch('requests.Session.post')
+def test_compress_multi_one_result_per_prompt(mock_post, compressor, api_response):
+    def respond(url, headers=None, data=None, timeout=None):
+        payload = json.loads(data)
+        return api_response({"results": {"compressed_prompt": f"{payload['prompt']}: {payload['context']}"}})
+    mock_post.side_effect = respond
+
+    prompts = ["diagnosis", "medications", "metrics"]
+    results = compressor.compress_multi("report", prompts=prompts)
+
+    assert [r.content for r in results] == [f"{p}: report" for p in prompts]
+    with pytest.raises(ValueError):
+        compressor.compress_multi(["report"], prompts=prompts)
+
+@patch('requests.Session.post')
+def test_short_circuit_skips_small_contexts(mock_post, word_tokens, api_response):
+    mock_post.return_value = api_response({"results": {"compressed_prompt": "compressed"}})
+    comp = sd.ScaleDownCompressor(api_key="test_key", min_tokens=5, min_savings=3, skip_under_budget=True)
+
+    tiny = comp.compress(context="too short", prompt="p")
+    under = comp.compress(context="one two three four five six", prompt="p", max_tokens=10)
+    low_gain = comp.compress(context="one two three four five six", prompt="p", max_tokens=4)
+    sent = comp.compress(context="one two three four five six seven eight", prompt="p", max_tokens=4)
+
+    assert tiny.skipped and tiny.content == "too short"
+    assert tiny.details["skip_reason"] == "below_min_tokens"
+    assert under.details["skip_reason"] == "under_budget"
+    assert low_gain.details["skip_reason"] == "insufficient_savings"
+    assert not sent.skipped
+    assert mock_post.call_count == 1
+    assert comp.stats()["short_circuit"]["skipped_requests"] == 3
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Generous enough for slow CI machines; eager imports of requests/tiktoken alone blow it
+IMPORT_BUDGET_MS = float(os.environ.get("SCALEDOWN_IMPORT_BUDGET_MS", 100))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import scaledown
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({"ms": elapsed, "modules": sorted(m for m in ("requests", "tiktoken", "httpx", "numpy") if m in sys.modules)}))
+"""
+
+def _import_probe():
+    # Fresh interpreter so nothing is already cached in sys.modules; best of three
+    runs = [
+        json.loads(subprocess.run([sys.executable, "-c", _PROBE], check=True, capture_output=True, text=True).stdout)
+        for _ in range(3)
+    ]
+    return min(r["ms"] for r in runs), runs[0]["modules"]
+
+def test_import_defers_heavy_dependencies():
+    elapsed_ms, loaded = _import_probe()
+    assert loaded == []
+    assert elapsed_ms < IMPORT_BUDGET_MS, f"import scaledown took {elapsed_ms:.1f} ms"
+
+def test_lazy_attributes_resolve():
+    import scaledown as sd
+    from scaledown.compressor.scaledown_compressor import ScaleDownCompressor
+
+    assert sd.ScaleDownCompressor is ScaleDownCompressor
+    assert sd.types.CompressedPrompt is sd.CompressedPrompt
+    assert set(sd.__all__) <= set(dir(sd))
+    with pytest.raises(AttributeError):
+        sd.NotAThing
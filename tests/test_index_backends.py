@@ -0,0 +1,112 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("faiss")
+
+from scaledown.optimizer import index_backends
+from scaledown.optimizer.index_backends import ExactBackend, exact_search, make_backend, select_backend
+from scaledown.optimizer.vector_index import CodeIndex
+from scaledown.testing.index_benchmark import benchmark
+
+
+def test_select_backend_by_size_and_recall():
+    assert select_backend(1_000) == "exact"
+    assert select_backend(index_backends.EXACT_MAX_UNITS + 1) == "hnsw"
+    assert select_backend(index_backends.HNSW_MAX_UNITS + 1) == "hnsw"
+    assert select_backend(index_backends.HNSW_MAX_UNITS + 1, recall_target=0.5) == "ivfpq"
+    assert select_backend(10 ** 7, recall_target=1.0) == "exact"
+
+def test_exact_backend_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 8)).astype(np.float32)
+    ids = np.arange(200, dtype=np.int64) * 7
+    queries = rng.normal(size=(3, 8)).astype(np.float32)
+
+    backend = ExactBackend()
+    backend.build(ids, vectors)
+    distances, labels = backend.search(queries, 5)
+    expected = ((queries[:, None, :] - vectors[None]) ** 2).sum(-1).argsort(axis=1)[:, :5]
+    assert (labels == ids[expected]).all()
+    assert (np.diff(distances, axis=1) >= 0).all()
+
+    backend.remove(ids[expected[0, :1]])
+    _, labels = backend.search(queries[:1], 1, ids=ids[:100])
+    assert labels[0, 0] != ids[expected[0, 0]] and labels[0, 0] in ids[:100]
+    assert exact_search(queries, None, None, 2)[1].tolist() == [[-1, -1]] * 3
+
+@pytest.mark.parametrize("name", ["hnsw", "ivfpq"])
+def test_approximate_backends_find_neighbours(name):
+    rows = benchmark(sizes=[2_000], dim=16, n_queries=20, k=5, backends=[name])
+    assert rows[0]["recall"] >= 0.4
+
+def test_code_index_rebuilds_backend_after_edits(tmp_path):
+    index = CodeIndex(str(tmp_path), backend="hnsw")
+    path = tmp_path / "a.py"
+    path.write_text("x")
+    units = [{"type": "function", "name": f"f{i}", "code": f"def f{i}(): pass"} for i in range(50)]
+    vectors = {u["code"]: np.full(4, i, dtype=np.float32) for i, u in enumerate(units)}
+    embed = lambda codes: np.stack([vectors[c] for c in codes])
+
+    index.update_file(str(path), path.stat(), "h1", units, embed)
+    assert index.search(np.full((1, 4), 10, dtype=np.float32), 1)[0][0][1]["name"] == "f10"
+    index.update_file(str(path), path.stat(), "h2", units[:10], embed)
+    assert index.search(np.full((1, 4), 30, dtype=np.float32), 1)[0][0][1]["name"] == "f9"
+    index.save()
+
+    reloaded = CodeIndex(str(tmp_path), backend="hnsw")
+    assert len(reloaded) == 10
+    assert reloaded.search(np.full((1, 4), 3, dtype=np.float32), 1)[0][0][1]["name"] == "f3"
+
+def test_hnsw_edit_does_not_rebuild(tmp_path, monkeypatch):
+    builds = []
+    original_build = index_backends.HNSWBackend.build
+    monkeypatch.setattr(index_backends.HNSWBackend, "build",
+                        lambda self, ids, vectors: builds.append(len(ids)) or original_build(self, ids, vectors))
+
+    index = CodeIndex(str(tmp_path), backend="hnsw")
+    path = tmp_path / "a.py"
+    path.write_text("x")
+    units = [{"type": "function", "name": f"f{i}", "code": f"def f{i}(): pass"} for i in range(50)]
+    vectors = {u["code"]: np.full(4, i, dtype=np.float32) for i, u in enumerate(units)}
+    vectors["def f10(): return 1"] = np.full(4, 100, dtype=np.float32)
+    embed = lambda codes: np.stack([vectors[c] for c in codes])
+    query = np.full((1, 4), 10, dtype=np.float32)
+
+    index.update_file(str(path), path.stat(), "h1", units, embed)
+    assert index.search(query, 1)[0][0][1]["name"] == "f10"
+
+    edited = units[:10] + [{"type": "function", "name": "f10", "code": "def f10(): return 1"}] + units[11:]
+    index.update_file(str(path), path.stat(), "h2", edited, embed)
+    assert {h[1]["name"] for h in index.search(query, 2)[0]} == {"f9", "f11"}
+    assert builds == [50]
+    index.save()
+
+    # A restart reuses the saved graph and still hides the removed vector
+    reloaded = CodeIndex(str(tmp_path), backend="hnsw")
+    assert {h[1]["name"] for h in reloaded.search(query, 2)[0]} == {"f9", "f11"}
+    assert builds == [50]
+
+def test_code_index_rows_stay_consistent_across_edits(tmp_path):
+    rng = np.random.default_rng(0)
+    index = CodeIndex(str(tmp_path), backend="exact")
+    path = tmp_path / "a.py"
+    path.write_text("x")
+    embed = lambda codes: np.stack([np.full(4, int(c.split("_")[1]), dtype=np.float32) for c in codes])
+    query = np.full((1, 4), 7, dtype=np.float32)
+
+    live = {}
+    for step in range(40):
+        name = f"m{step % 6}.py"
+        values = rng.choice(500, size=int(rng.integers(0, 12)), replace=False)
+        units = [{"type": "function", "name": f"f_{v}", "code": f"f_{v}_{name}"} for v in values]
+        index.update_file(str(tmp_path / name), path.stat(), f"h{step}", units, embed)
+        live[name] = set(int(v) for v in values)
+        index.search(query, 1)  # builds the backend so later edits must invalidate it
+
+        gaps = [abs(v - 7) for vs in live.values() for v in vs]
+        hits = index.search(query, 1)[0]
+        assert [abs(int(h[1]["name"].split("_")[1]) - 7) for h in hits] == [min(gaps)] * bool(gaps)
+        assert len(index) == sum(len(vs) for vs in live.values())
+
+    index.save()
+    assert len(CodeIndex(str(tmp_path), backend="exact")) == len(index)
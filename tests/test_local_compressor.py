@@ -0,0 +1,77 @@
+import pytest
+import scaledown as sd
+
+CONTEXT = (
+    "The patient was prescribed Metformin 500mg twice daily for type 2 diabetes. "
+    "The weather on the day of the visit was sunny and warm. "
+    "The weather on the day of the visit was sunny and very warm. "
+    "Blood pressure readings were stable at 120/80 across three visits. "
+    "The clinic parking lot was recently repaved. "
+    "Follow-up in six weeks to review HbA1c and adjust the diabetes medication."
+)
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    """Count one token per word so budgets are deterministic."""
+    monkeypatch.setattr(
+        "scaledown.compressor.local_compressor.count_tokens",
+        lambda text, model="gpt-4o", counter=None: len(text.split())
+    )
+
+def test_keeps_prompt_relevant_sentences():
+    comp = sd.LocalCompressor(rate=0.4)
+    result = comp.compress(context=CONTEXT, prompt="What diabetes medication is the patient on?")
+
+    assert isinstance(result, sd.CompressedPrompt)
+    assert "Metformin" in result.content
+    assert "HbA1c" in result.content
+    assert "parking lot" not in result.content
+    assert result.tokens[1] <= result.tokens[0] * 0.4
+    assert result.model == "local"
+
+def test_drops_redundant_sentences():
+    comp = sd.LocalCompressor(rate=0.9, redundancy_threshold=0.7)
+    result = comp.compress(context=CONTEXT, prompt="weather")
+    assert result.content.count("The weather") == 1
+
+def test_max_tokens_and_preserve_words():
+    comp = sd.LocalCompressor(preserve_words=["parking"])
+    result = comp.compress(context=CONTEXT, prompt="diabetes medication", max_tokens=30)
+
+    assert "parking" in result.content
+    assert result.tokens[1] <= 30
+
+def test_local_compressor_in_pipeline():
+    pipe = sd.Pipeline([("local", sd.LocalCompressor(rate=0.5))])
+    result = pipe.run(context=CONTEXT, prompt="blood pressure")
+
+    assert "120/80" in result.final_content
+    assert result.history[0].details["type"] == "compression"
+    assert result.final_tokens < result.original_tokens
+
+LONG_SENTENCE = (
+    "The patient reported that the new Metformin dose of 500mg was causing mild nausea "
+    "in the mornings but that it was otherwise well tolerated"
+)
+
+@pytest.mark.parametrize("kwargs, budget", [({"rate": 0.5}, 12), ({"max_tokens": 10}, 10)])
+def test_single_long_sentence_is_pruned_to_budget(kwargs, budget):
+    max_tokens = kwargs.pop("max_tokens", None)
+    comp = sd.LocalCompressor(preserve_keywords=True, **kwargs)
+    result = comp.compress(context=LONG_SENTENCE, prompt="Metformin side effects", max_tokens=max_tokens)
+
+    assert result.content
+    assert 0 < result.tokens[1] <= budget
+    assert "Metformin" in result.content and "500mg" in result.content
+
+def test_best_sentence_kept_when_none_fits():
+    comp = sd.LocalCompressor()
+    result = comp.compress(context=CONTEXT, prompt="blood pressure readings", max_tokens=5)
+
+    assert 0 < result.tokens[1] <= 5
+    assert "Blood" in result.content or "pressure" in result.content
+
+def test_preserve_words_match_whole_words():
+    comp = sd.LocalCompressor(preserve_words=["lot"], rate=0.3)
+    assert comp._is_preserved("The clinic parking lot was repaved.")
+    assert not comp._is_preserved("A lottery was held.")
@@ -0,0 +1,137 @@
+import json
+import os
+import pytest
+from unittest.mock import MagicMock
+from scaledown.types import metrics, token_estimator
+from scaledown.types.metrics import count_tokens, count_tokens_batch, get_encoding, set_token_memo
+
+
+class FakeEncoding:
+    """Whitespace 'tokenizer' standing in for a tiktoken encoding."""
+    name = "fake_base"
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, text):
+        self.encoded += 1
+        return text.split()
+
+    def encode_batch(self, texts, num_threads=8):
+        return [self.encode(t) for t in texts]
+
+
+@pytest.fixture
+def fake_tiktoken(monkeypatch):
+    encoding = FakeEncoding()
+
+    def encoding_for_model(model):
+        if not model.startswith("gpt"):
+            raise KeyError(model)
+        return encoding
+
+    module = MagicMock()
+    module.encoding_for_model.side_effect = encoding_for_model
+    module.get_encoding.return_value = encoding
+    monkeypatch.setattr(metrics, "tiktoken", module)
+    get_encoding.cache_clear()
+    yield module, encoding
+    get_encoding.cache_clear()
+    set_token_memo(0)
+
+def test_encoding_resolved_once_per_model(fake_tiktoken):
+    module, encoding = fake_tiktoken
+    for _ in range(3):
+        assert count_tokens("one two three", model="llama-3") == 3
+        assert count_tokens("one two", model="gpt-4o") == 2
+
+    assert module.encoding_for_model.call_count == 2
+    assert module.get_encoding.call_count == 1
+
+def test_count_tokens_batch(fake_tiktoken):
+    texts = ["a b", "", "c d e"]
+    assert count_tokens_batch(texts) == [2, 0, 3]
+    assert count_tokens_batch(texts) == [count_tokens(t) for t in texts]
+
+def test_token_memo(fake_tiktoken):
+    _, encoding = fake_tiktoken
+    set_token_memo(2)
+    count_tokens("a b c")
+    count_tokens("a b c")
+    assert encoding.encoded == 1
+
+    count_tokens_batch(["a b c", "d", "e f"])
+    assert encoding.encoded == 3  # "a b c" was memoised
+    count_tokens("a b c")         # evicted by the two newer entries
+    assert encoding.encoded == 4
+
+@pytest.fixture
+def approx_counter():
+    yield
+    metrics.set_token_counter("exact")
+
+def test_approx_counter_skips_tiktoken(fake_tiktoken, approx_counter):
+    _, encoding = fake_tiktoken
+    text = "The quick brown fox jumps over the lazy dog."
+    assert 7 <= count_tokens(text, counter="approx") <= 13
+    assert encoding.encoded == 0
+
+    metrics.set_token_counter("approx")
+    assert count_tokens(text) == count_tokens(text, counter="approx")
+    assert count_tokens_batch([text, ""]) == [count_tokens(text), 0]
+    assert count_tokens(text, counter="exact") == 9
+    with pytest.raises(ValueError):
+        metrics.set_token_counter("fast")
+
+def test_estimator_bounds_contain_estimate():
+    text = "def add(a, b):\n    return a + b\n"
+    default = token_estimator.get_estimator("gpt-4o")
+    low, high = default.bounds(text)
+    assert default.calibrated and low <= default.estimate(text) <= high
+
+    # Hand-built estimators have no measured error, so they claim no interval
+    unmeasured = token_estimator.TokenEstimator("cl100k_base", default.coefficients)
+    assert not unmeasured.calibrated and unmeasured.bounds(text) is None
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "token_corpus.jsonl")
+
+@pytest.mark.parametrize("encoding", ["cl100k_base", "o200k_base"])
+def test_default_estimators_meet_published_errors(encoding):
+    """The shipped estimators stay within their published errors on their calibration corpus."""
+    with open(CORPUS, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    estimator = token_estimator._DEFAULTS[encoding]
+    errors = [abs(estimator.estimate(row["text"]) - row[encoding]) / row[encoding] for row in rows]
+
+    assert estimator.samples == len(rows)
+    assert sum(e <= estimator.p95_error + 1e-9 for e in errors) >= 0.95 * len(rows)
+    assert max(errors) <= estimator.max_error + 1e-9
+    assert sum(errors) / len(errors) <= estimator.mean_error + 1e-4
+    covered = sum(low <= row[encoding] <= high for row in rows for low, high in [estimator.bounds(row["text"])])
+    assert covered >= 0.95 * len(rows)
+
+@pytest.mark.parametrize("encoding, model", [("cl100k_base", "gpt-4"), ("o200k_base", "gpt-4o")])
+def test_default_estimators_reproduce_from_corpus(encoding, model):
+    tiktoken = pytest.importorskip("tiktoken")
+    try:
+        enc = tiktoken.get_encoding(encoding)
+    except Exception:
+        pytest.skip(f"{encoding} is not available offline")
+    with open(CORPUS, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [len(enc.encode(row["text"], disallowed_special=())) for row in rows] == [row[encoding] for row in rows]
+
+    fitted = token_estimator.calibrate([row["text"] for row in rows], model=model, register=False)
+    assert fitted.coefficients == pytest.approx(token_estimator._DEFAULTS[encoding].coefficients, abs=1e-4)
+
+def test_calibrate_fits_exact_counts(fake_tiktoken, monkeypatch):
+    monkeypatch.setattr(token_estimator, "_estimators", dict(token_estimator._DEFAULTS))
+    monkeypatch.setattr(token_estimator, "encoding_name_for_model", lambda model: "fake_base")
+    vocab = ["a", "tokens", "internationalisation", "x1", "de", "function", "ok"]
+    corpus = [" ".join(vocab[(n * i) % len(vocab)] for i in range(n)) + " ." * (n % 3) for n in range(1, 40)]
+
+    estimator = token_estimator.calibrate(corpus, model="gpt-4o")
+    assert estimator.encoding == "fake_base" and estimator.samples == len(corpus)
+    assert estimator.max_error < 0.05 and estimator.calibrated
+    assert token_estimator.get_estimator("gpt-4o") is estimator
+    assert count_tokens("a b c d e f", counter="approx") == 6
@@ -0,0 +1,53 @@
+import pytest
+import scaledown as sd
+from scaledown.compressor import AIMDLimiter
+from scaledown.testing import MockScaleDownServer
+
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    servers = []
+
+    def start(**kwargs):
+        server = MockScaleDownServer(seed=0, **kwargs).start()
+        servers.append(server)
+        monkeypatch.setenv("SCALEDOWN_API_URL", server.url)
+        return server
+    yield start
+    for server in servers:
+        server.stop()
+
+def test_compress_against_mock_server(mock_api):
+    server = mock_api(latency_ms=5)
+    with sd.ScaleDownCompressor(api_key="test_key", rate=0.5) as comp:
+        result = comp.compress(context="one two three four five six", prompt="p")
+        batch = comp.compress(context=[f"ctx {i} " * 10 for i in range(8)], prompt="p")
+
+    assert result.content == "one two three"
+    assert result.tokens == (6, 3)
+    assert result.latency == 5
+    assert len(batch) == 8
+    assert server.stats()["ok"] == 9
+
+def test_gzip_bodies_accepted(mock_api):
+    mock_api()
+    with sd.ScaleDownCompressor(api_key="test_key", request_compression="gzip") as comp:
+        result = comp.compress(context="word " * 1000, prompt="p")
+        assert result.details["bytes_sent"] < result.details["bytes_uncompressed"]
+        assert result.tokens[0] == 1000
+
+def test_rejected_coding_falls_back(mock_api):
+    server = mock_api(accept_encoding=None)
+    with sd.ScaleDownCompressor(api_key="test_key", request_compression="gzip") as comp:
+        result = comp.compress(context="word " * 1000, prompt="p")
+    assert result.details["bytes_sent"] == result.details["bytes_uncompressed"]
+    assert server.stats()["unsupported_encoding"] == 1
+
+def test_injected_rate_limits_shrink_concurrency(mock_api):
+    mock_api(rate_limit_rate=1.0)
+    limiter = AIMDLimiter(initial_limit=8)
+    with sd.ScaleDownCompressor(api_key="test_key", limiter=limiter) as comp:
+        with pytest.raises(sd.APIError) as exc_info:
+            comp.compress(context="ctx", prompt="p")
+    assert exc_info.value.status_code == 429
+    assert limiter.limit < 8
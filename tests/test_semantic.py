@@ -1,10 +1,13 @@
 import os
+import json
 import tempfile
+from pathlib import Path
 import pytest
 from unittest.mock import patch, MagicMock
 import numpy as np
 
 import scaledown as sd
+from scaledown.exceptions import OptimizerError
 from scaledown.types import OptimizedContext
 
 try:
@@ -32,6 +35,14 @@ def helper_function():
     pass
 """
 
+@pytest.fixture(autouse=True)
+def fresh_model_registry():
+    """Models are shared process-wide; keep mocked ones from leaking between tests."""
+    from scaledown.optimizer import model_registry
+    model_registry.release()
+    yield
+    model_registry.release()
+
 @pytest.fixture
 def temp_python_file():
     with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
@@ -101,3 +112,284 @@ def test_missing_file_path():
     
     assert result.content == "some context"
     assert result.metrics.retrieval_mode.startswith("fallback")
+
+class CountingModel:
+    """Deterministic stand-in for a SentenceTransformer that records what it encodes."""
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[t.count("data"), t.count("render"), 1.0] for t in texts], dtype=np.float32)
+
+@pytest.fixture
+def fake_semantic(monkeypatch):
+    """Semantic optimizer factory with a counting model and word-count metrics."""
+    monkeypatch.setattr(
+        "scaledown.optimizer.semantic_code.count_tokens",
+        lambda text, model="gpt-4o", counter=None: len(str(text).split())
+    )
+
+    def make(**kwargs):
+        opt = SemanticOptimizer(**kwargs)
+        opt._model, opt._numpy = CountingModel(), np
+        return opt
+    return make
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_unchanged_units_are_not_re_embedded(fake_semantic, temp_python_file):
+    opt = fake_semantic(top_k=1, query_cache_size=8)
+    opt.optimize(context="", file_path=temp_python_file, query="process data")
+    first = len(opt._model.encoded)
+    opt.optimize(context="", file_path=temp_python_file, query="process data")
+    assert len(opt._model.encoded) == first  # units and query both cached
+
+    with open(temp_python_file, "a", encoding="utf-8") as f:
+        f.write("\ndef new_helper():\n    return 1\n")
+    opt.optimize(context="", file_path=temp_python_file, query="process data")
+    assert opt._model.encoded[first:] == ["def new_helper():\n    return 1"]
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_disk_embedding_cache_shared_between_instances(fake_semantic, temp_python_file, tmp_path):
+    first = fake_semantic(top_k=1, cache_dir=str(tmp_path))
+    expected = first.optimize(context="", file_path=temp_python_file, query="process data").content
+    first.embedding_cache.close()
+
+    second = fake_semantic(top_k=1, cache_dir=str(tmp_path))
+    result = second.optimize(context="", file_path=temp_python_file, query="process data")
+    assert second._model.encoded == ["process data"]
+    assert result.content == expected
+    assert second.embedding_cache.stats()["hit_rate"] == 1.0
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_persistent_index_updates_only_edited_units(fake_semantic, temp_python_file, tmp_path):
+    first = fake_semantic(top_k=2, index_dir=str(tmp_path))
+    first.optimize(context="", file_path=temp_python_file, query="process data")
+    ids = list(first.index.entry(temp_python_file)["ids"])
+
+    # A new process with the same index directory neither parses nor embeds the unchanged file
+    second = fake_semantic(top_k=2, index_dir=str(tmp_path))
+    second._parse_units = MagicMock(side_effect=AssertionError("file should not be re-parsed"))
+    result = second.optimize(context="", file_path=temp_python_file, query="process data")
+    assert second._model.encoded == ["process data"]
+    assert result.metrics.original_tokens > 0
+    del second._parse_units
+
+    with open(temp_python_file, "w", encoding="utf-8") as f:
+        f.write(TEST_CODE.replace("pass", "return None"))
+    second.optimize(context="", file_path=temp_python_file, query="process data")
+    new_ids = second.index.entry(temp_python_file)["ids"]
+    assert second._model.encoded[1:] == ["def helper_function():\n    return None"]
+    assert len(set(ids) & set(new_ids)) == len(ids) - 1
+    assert len(second.index) == len(ids)
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_directory_search_ranks_units_across_files(fake_semantic, tmp_path, monkeypatch):
+    monkeypatch.setattr("scaledown.optimizer.semantic_code._PARALLEL_PARSE_MIN_FILES", 2)
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "loader.py").write_text("def load_data():\n    return 'data data data'\n")
+    (tmp_path / "pkg" / "render.py").write_text("def render():\n    return 1\n")
+    (tmp_path / "pkg" / "broken.py").write_text("def broken(:\n")
+    (tmp_path / ".venv").mkdir()
+    (tmp_path / ".venv" / "ignored.py").write_text("def data_data_data():\n    pass\n")
+
+    opt = fake_semantic(top_k=1, parse_workers=2)
+    result = opt.optimize(context="", file_path=str(tmp_path), query="data data data")
+
+    assert result.metrics.retrieval_mode == "semantic_search"
+    assert "def load_data" in result.content
+    assert result.sources[0]["file_path"].endswith("loader.py")
+    assert (result.sources[0]["start_line"], result.sources[0]["end_line"]) == (1, 2)
+    assert f"{tmp_path / 'pkg' / 'loader.py'}:1-2" in result.content
+    assert len(opt.index) == 2  # broken.py skipped, .venv not walked
+
+    glob_result = opt.optimize(context="", file_path=str(tmp_path / "pkg" / "r*.py"), query="data")
+    assert "def render" in glob_result.content
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_optimize_many_encodes_queries_in_one_batch(fake_semantic, temp_python_file):
+    opt = fake_semantic(top_k=1)
+    opt._model.encode = MagicMock(side_effect=opt._model.encode)
+    queries = ["process data", "render", "process data"]
+    results = opt.optimize_many(queries, file_path=temp_python_file)
+
+    assert len(results) == 3
+    assert results[0].content == results[2].content == opt.optimize(context="", file_path=temp_python_file, query="process data").content
+    assert all(r.metrics.retrieval_mode == "semantic_search" for r in results)
+    # One call for the units, one for the distinct queries; the repeat hits the LRU
+    assert opt._model.encode.call_count == 2
+    assert opt._model.encode.call_args_list[1].args[0] == ["process data", "render"]
+
+def test_model_registry_loads_once_under_concurrency():
+    import threading
+    import time
+    from scaledown.optimizer import model_registry
+
+    calls = []
+    def slow_loader(name):
+        calls.append(name)
+        time.sleep(0.05)
+        return CountingModel()
+
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(model_registry.get_model("m", slow_loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["m"]
+    assert all(m is models[0] for m in models)
+    assert not model_registry.is_ready("m")
+    model_registry.warmup("m")
+    assert model_registry.is_ready("m") and models[0].encoded
+    assert model_registry.status()["m"]["warm"] is True
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_optimizers_share_warm_model():
+    with patch("sentence_transformers.SentenceTransformer", return_value=CountingModel()) as MockModel:
+        first, second = SemanticOptimizer(), SemanticOptimizer()
+        assert not first.ready
+        first.warmup()
+        assert second.ready
+        second._lazy_load_deps()
+        assert second._model is first._model
+        assert MockModel.call_count == 1
+
+def test_hashing_embedder_is_deterministic_and_lexical():
+    from scaledown.optimizer import HashingEmbedder
+
+    embedder = HashingEmbedder(dim=256)
+    units = ["def load_data(source):\n    return read(source)", "def render_page(tpl):\n    return tpl.render()", ""]
+    vectors = embedder.encode(units)
+    assert vectors.shape == (3, 256) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:2], axis=1), 1.0) and not vectors[2].any()
+    assert np.array_equal(vectors, HashingEmbedder(dim=256).encode(units))
+
+    # camelCase and snake_case spellings share sub-word features
+    query = embedder.encode(["loadData"])[0]
+    assert np.linalg.norm(vectors[0] - query) < np.linalg.norm(vectors[1] - query)
+    with pytest.raises(ValueError):
+        HashingEmbedder(dim=300)
+
+def test_semantic_search_with_hashing_embedder(temp_python_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "scaledown.optimizer.semantic_code.count_tokens",
+        lambda text, model="gpt-4o", counter=None: len(str(text).split())
+    )
+    from scaledown.optimizer.semantic_code import SemanticOptimizer as Optimizer
+
+    with patch("scaledown.optimizer.model_registry.get_model", side_effect=AssertionError("no model needed")):
+        opt = Optimizer(top_k=1, embedder="hashing", cache_dir=str(tmp_path))
+        opt.warmup()
+        assert opt.ready
+        result = opt.optimize(context="", file_path=temp_python_file, query="process_batch")
+
+    assert result.metrics.retrieval_mode == "semantic_search"
+    assert "def process_batch" in result.content
+    assert opt.embedding_cache.model_name == opt.embedder.name
+
+NESTED_CODE = """class Store:
+    def data_one(self):
+        return "data data data"
+
+    def data_two(self):
+        return "data data"
+
+def render():
+    return 0
+"""
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_packing_skips_overlapping_units_and_respects_budget(fake_semantic, tmp_path):
+    path = tmp_path / "store.py"
+    path.write_text(NESTED_CODE)
+    opt = fake_semantic(top_k=3)
+
+    # Store contains both better-ranked methods, so it is skipped
+    result = opt.optimize(context="", file_path=str(path), query="data data data data")
+    assert [s["name"] for s in result.sources] == ["data_one", "data_two", "render"]
+    assert result.content.count("def data_one") == 1
+    assert result.metrics.dedup_tokens_saved == 6 + 5
+
+    # Only data_one (6 words) fits; data_two plus the 7-word separator does not
+    budgeted = opt.optimize(context="", file_path=str(path), query="data data data data", max_tokens=8)
+    assert [s["name"] for s in budgeted.sources] == ["data_one"]
+    assert budgeted.metrics.optimized_tokens <= 8
+
+def test_pack_skips_children_of_selected_parent():
+    from scaledown.optimizer.semantic_code import _pack
+
+    def unit(name, start, end):
+        return {"name": name, "metadata": {"file_path": "a.py", "start_line": start, "end_line": end}}
+
+    hits = [(0.1, unit("Cls", 1, 20)), (0.2, unit("method", 5, 9)), (0.3, unit("other", 30, 32))]
+    chosen, saved = _pack(hits, [40, 10, 5], limit=3)
+    assert chosen == [0, 2] and saved == 10
+    # When the class does not fit the budget its method is taken instead
+    assert _pack(hits, [40, 10, 5], limit=3, budget=20) == ([1, 2], 0)
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_directory_fallback_skips_broken_files_and_needs_a_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "scaledown.optimizer.semantic_code.count_tokens",
+        lambda text, model="gpt-4o", counter=None: len(str(text).split())
+    )
+    (tmp_path / "a.py").write_text("def a():\n    return 1\n")
+    (tmp_path / "b.py").write_text("def broken(:\n")
+    (tmp_path / "c.py").write_text("def c():\n    return 2 + 2 + 2 + 2\n")
+
+    with patch("sentence_transformers.SentenceTransformer", side_effect=Exception("offline")):
+        opt = SemanticOptimizer()
+        with pytest.raises(sd.ScaleDownError):
+            opt.optimize(context="", file_path=str(tmp_path), query="q")
+
+        result = opt.optimize(context="", file_path=str(tmp_path), query="q", max_tokens=6)
+
+    assert result.metrics.retrieval_mode == "fallback_model_load_failed"
+    assert "def a()" in result.content and "broken" not in result.content and "def c()" not in result.content
+    assert result.metrics.optimized_tokens <= 6
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_missing_explicit_file_raises(fake_semantic, tmp_path):
+    missing = str(tmp_path / "nonexistent.py")
+    with pytest.raises(OptimizerError):
+        fake_semantic().optimize(context="", file_path=missing, query="q")
+
+    with patch("sentence_transformers.SentenceTransformer", side_effect=Exception("offline")):
+        with pytest.raises(OptimizerError, match="Failed to parse AST"):
+            SemanticOptimizer().optimize(context="", file_path=missing, query="q", max_tokens=100)
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_deleted_files_are_dropped_from_the_index(fake_semantic, tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "loader.py").write_text("def load_data():\n    return 'data'\n")
+    (tmp_path / "pkg" / "render.py").write_text("def render():\n    return 1\n")
+    (tmp_path / "pkg" / "extra.py").write_text("def extra():\n    return 2\n")
+    opt = fake_semantic(top_k=1, index_dir=str(tmp_path / "index"))
+    opt.optimize(context="", file_path=str(tmp_path / "pkg"), query="data")
+    assert len(opt.index) == 3
+
+    os.remove(tmp_path / "pkg" / "render.py")
+    opt.optimize(context="", file_path=str(tmp_path / "pkg"), query="data")
+    assert opt.index.entry(str(tmp_path / "pkg" / "render.py")) is None
+    assert len(opt.index) == 2
+
+    # Files outside the pattern are kept unless they are gone too
+    os.remove(tmp_path / "pkg" / "extra.py")
+    opt.optimize(context="", file_path=str(tmp_path / "pkg" / "l*.py"), query="data")
+    assert opt.index.files() == [str(tmp_path / "pkg" / "loader.py")]
+
+@pytest.mark.skipif(not SEMANTIC_DEPS_AVAILABLE, reason="Semantic deps not installed")
+def test_unit_tokens_counted_at_index_time(fake_semantic, temp_python_file, tmp_path):
+    opt = fake_semantic(top_k=1, index_dir=str(tmp_path))
+    opt.optimize(context="", file_path=temp_python_file, query="process data")
+    manifest = Path(opt.index.path) / "manifest.json"
+    saved = json.loads(manifest.read_text())
+    assert all(unit["tokens"] for unit in saved["units"].values())
+
+    # New queries against an unchanged index do not rewrite it
+    before = manifest.stat().st_mtime_ns
+    opt.optimize(context="", file_path=temp_python_file, query="render")
+    opt.optimize(context="", file_path=temp_python_file, query="helper", max_tokens=20)
+    assert manifest.stat().st_mtime_ns == before